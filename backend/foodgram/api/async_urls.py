@@ -0,0 +1,11 @@
+from django.urls import re_path
+
+from api import async_views
+
+urlpatterns = [
+    re_path(r'^recipes/$', async_views.recipe_list),
+    # Только числовые id, иначе маршрут перехватит действия роутера
+    # вроде recipes/feed/ и recipes/download_shopping_cart/
+    re_path(r'^recipes/(?P<pk>\d+)/$', async_views.recipe_detail),
+    re_path(r'^ingredients/$', async_views.ingredient_list),
+]
@@ -0,0 +1,112 @@
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.http import HttpResponse
+from rest_framework.renderers import JSONRenderer
+
+from api.authentication import has_cached_credentials
+from api.conditional import make_etag, set_validators
+from api.middleware import track_queries
+from api.response_cache import (CATALOG_VERSION_KEY, aget_detail_key,
+                                aget_list_key)
+from api.serializers import IngredientSerializer
+from api.urls import v1_router
+from foodgram.versions import aget_version, get_versions_time
+from recipes.search import ingredient_index
+
+ROUTER_VIEWS = {pattern.name: pattern.callback for pattern in v1_router.urls}
+
+
+def wants_json(request):
+    return (
+        'format' not in request.GET
+        and 'text/html' not in request.META.get('HTTP_ACCEPT', '')
+    )
+
+
+def is_conditional(request):
+    # Условные запросы проверяет сама вьюха DRF
+    return (
+        'HTTP_IF_NONE_MATCH' in request.META
+        or 'HTTP_IF_MODIFIED_SINCE' in request.META
+    )
+
+
+def get_default_headers(view):
+    instance = view.cls(**view.initkwargs)
+    for method, action in view.actions.items():
+        setattr(instance, method, getattr(instance, action))
+    return instance.default_response_headers
+
+
+def async_viewset_view(name, fast_path=None):
+    """Async-вьюха для ASGI поверх вьюхи роутера DRF с именем name.
+
+    fast_path отдаёт данные без обращения к бд (из кэша или индекса)
+    прямо в цикле событий вместе с ETag и Last-Modified ответа
+    (словарь data, etag, last_modified), а если их нет, возвращает None,
+    и запрос обрабатывает сама вьюха DRF в отдельном потоке.
+    """
+    router_view = ROUTER_VIEWS[name]
+    view = track_queries(router_view)
+    headers = get_default_headers(router_view)
+
+    async def async_view(request, *args, **kwargs):
+        if (
+            fast_path is not None
+            and request.method == 'GET'
+            and wants_json(request)
+            and not is_conditional(request)
+        ):
+            entry = await fast_path(request, *args, **kwargs)
+            if entry is not None:
+                response = HttpResponse(
+                    JSONRenderer().render(entry['data']),
+                    content_type='application/json',
+                )
+                for name, value in headers.items():
+                    response[name] = value
+                return set_validators(
+                    response, entry['etag'], entry['last_modified']
+                )
+        return await sync_to_async(view)(request, *args, **kwargs)
+
+    async_view.csrf_exempt = True
+    async_view.cls = router_view.cls
+    async_view.actions = router_view.actions
+    return async_view
+
+
+async def cached_recipe_list(request):
+    if 'HTTP_AUTHORIZATION' in request.META:
+        return None
+    return await cache.aget(await aget_list_key(request))
+
+
+async def cached_recipe_detail(request, pk):
+    if 'HTTP_AUTHORIZATION' in request.META:
+        return None
+    return await cache.aget(await aget_detail_key(request, pk))
+
+
+async def indexed_ingredient_search(request):
+    name = request.GET.get('name')
+    if name is None or not await has_cached_credentials(request):
+        return None
+    ingredients = await ingredient_index.asearch_if_fresh(name)
+    if ingredients is None:
+        return None
+    version = await aget_version(CATALOG_VERSION_KEY)
+    return {
+        'data': IngredientSerializer(ingredients, many=True).data,
+        'etag': make_etag(request, version, format='json'),
+        'last_modified': get_versions_time(version),
+    }
+
+
+recipe_list = async_viewset_view('api_recipes-list', cached_recipe_list)
+recipe_detail = async_viewset_view(
+    'api_recipes-detail', cached_recipe_detail
+)
+ingredient_list = async_viewset_view(
+    'api_ingredients-list', indexed_ingredient_search
+)
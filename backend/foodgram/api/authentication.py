@@ -0,0 +1,109 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from rest_framework.authentication import TokenAuthentication
+
+from foodgram.db_router import read_from_primary
+from foodgram.versions import aget_version, bump_versions, get_version
+
+AUTH_VERSION_KEY = 'auth_token:version:{}'
+
+
+class TokenCache:
+    """Ограниченный LRU-кэш токенов с временем жизни записей.
+
+    Кэш живёт в памяти процесса. Вместе с токеном хранится версия
+    пользователя из общего кэша django, поэтому выход из системы или
+    изменение пользователя в другом процессе тоже сбрасывает запись,
+    а время жизни ограничивает устаревание, если версия сменилась
+    между запросом к бд и её чтением.
+    """
+
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            token, version, expires_at = entry
+            if time.monotonic() >= expires_at:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return token, version
+
+    def set(self, key, token, version):
+        with self._lock:
+            self._entries[key] = (
+                token, version, time.monotonic() + self.ttl
+            )
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate_user(self, user_id):
+        with self._lock:
+            for key, (token, _, _) in list(self._entries.items()):
+                if token.user_id == user_id:
+                    del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+token_cache = TokenCache(settings.TOKEN_CACHE_SIZE, settings.TOKEN_CACHE_TTL)
+
+
+def get_user_version(user_id):
+    return get_version(AUTH_VERSION_KEY.format(user_id))
+
+
+async def has_cached_credentials(request):
+    """Проверяет заголовок Authorization без обращения к бд.
+
+    True, если заголовка нет или токен уже лежит в кэше и не отозван.
+    """
+    header = request.META.get('HTTP_AUTHORIZATION')
+    if header is None:
+        return True
+    parts = header.split()
+    if len(parts) != 2 or parts[0].lower() != 'token':
+        return False
+    entry = token_cache.get(parts[1])
+    if entry is None:
+        return False
+    token, version = entry
+    return await aget_version(
+        AUTH_VERSION_KEY.format(token.user_id)
+    ) == version
+
+
+def revoke_user_tokens(*user_ids):
+    bump_versions(*[AUTH_VERSION_KEY.format(id) for id in user_ids])
+    for user_id in user_ids:
+        token_cache.invalidate_user(user_id)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """TokenAuthentication без запроса к бд для недавно виденных токенов."""
+
+    def authenticate_credentials(self, key):
+        entry = token_cache.get(key)
+        if entry is not None:
+            token, version = entry
+            if get_user_version(token.user_id) == version:
+                return copy.copy(token.user), token
+        with read_from_primary():
+            user, token = super().authenticate_credentials(key)
+        version = get_user_version(user.pk)
+        token_cache.set(key, token, version)
+        return copy.copy(user), token
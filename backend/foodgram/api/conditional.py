@@ -0,0 +1,113 @@
+import hashlib
+
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+from api.response_cache import (cached_response, get_catalog_version,
+                                get_versions, is_cacheable)
+from foodgram.versions import get_versions_time
+
+
+def hash_etag(*parts):
+    return quote_etag(hashlib.md5(repr(parts).encode()).hexdigest())
+
+
+def make_etag(request, *parts, format=None):
+    """ETag ответа из частей, от которых он зависит, плюс адрес
+    с параметрами и формат ответа.
+    """
+    return hash_etag(
+        request.get_full_path(),
+        format or request.accepted_renderer.format,
+        *parts,
+    )
+
+
+def make_validators(etag, versions):
+    """Валидаторы ответа: ETag и Last-Modified по времени версий кэша,
+    от которых зависит ответ.
+    """
+    return {'etag': etag, 'last_modified': get_versions_time(*versions)}
+
+
+def set_validators(response, etag, last_modified=None):
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+    return response
+
+
+def conditional_response(request, build, etag, last_modified=None):
+    """Отвечает 304 на If-None-Match/If-Modified-Since, не вызывая build,
+    иначе строит ответ и добавляет к нему ETag и Last-Modified
+    (время в секундах с начала эпохи).
+    """
+    if last_modified is not None:
+        last_modified = int(last_modified)
+    response = get_conditional_response(
+        request, etag=etag, last_modified=last_modified
+    )
+    if response is not None:
+        return response
+    response = build()
+    if response.status_code == 200:
+        set_validators(response, etag, last_modified)
+    return response
+
+
+def versioned_response(request, version_keys, make_key, build):
+    """Условный ответ, который меняется только вместе с версиями кэша
+    version_keys, поэтому проверка обходится без запросов к бд.
+
+    Анониму ответ отдаётся из кэша по ключу make_key(request, versions),
+    ETag тогда считается по ключу, чтобы совпадать с тем, что отдаёт
+    из кэша async-вьюха.
+    """
+    versions = get_versions(version_keys)
+    last_modified = get_versions_time(*versions)
+    if not is_cacheable(request):
+        return conditional_response(
+            request, build, make_etag(request, *versions), last_modified
+        )
+    key = make_key(request, versions)
+    return conditional_response(
+        request,
+        lambda: cached_response(
+            key,
+            build,
+            {'etag': hash_etag(key, 'json'), 'last_modified': last_modified},
+        ),
+        hash_etag(key, request.accepted_renderer.format),
+        last_modified,
+    )
+
+
+class CatalogConditionalMixin:
+    """Условные GET для справочников (теги, ингредиенты): их ответы
+    меняются только вместе с версией каталога в кэше, поэтому
+    проверка обходится без запросов к бд.
+    """
+
+    def catalog_response(self, request, build):
+        version = get_catalog_version()
+        return conditional_response(
+            request,
+            build,
+            **make_validators(make_etag(request, version), [version]),
+        )
+
+    def list(self, request, *args, **kwargs):
+        return self.catalog_response(
+            request,
+            lambda: super(CatalogConditionalMixin, self).list(
+                request, *args, **kwargs
+            ),
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.catalog_response(
+            request,
+            lambda: super(CatalogConditionalMixin, self).retrieve(
+                request, *args, **kwargs
+            ),
+        )
@@ -0,0 +1,52 @@
+from django.conf import settings
+from drf_extra_fields.fields import Base64ImageField
+from rest_framework import serializers
+
+from recipes.images import content_hash, get_image_field, get_image_url
+
+
+class RecipeImageField(Base64ImageField):
+    """Base64-картинка с ограничением размера и именем по хешу содержимого.
+
+    Повторная загрузка уже сохранённой картинки не пишет файл заново,
+    а ссылается на существующий. При чтении отдаёт уменьшенную копию
+    variant (или image_variant из контекста), если она уже готова.
+    """
+
+    def __init__(self, *args, variant=None, **kwargs):
+        self.variant = variant
+        super().__init__(*args, **kwargs)
+
+    def get_file_name(self, decoded_file):
+        if len(decoded_file) > settings.IMAGE_MAX_BYTES:
+            raise serializers.ValidationError(
+                'Размер картинки не может превышать '
+                f'{settings.IMAGE_MAX_BYTES // 1024 // 1024} МБ.'
+            )
+        return content_hash(decoded_file)
+
+    def to_internal_value(self, data):
+        image = super().to_internal_value(data)
+        if image is None:
+            return image
+        width, height = image.image.size
+        if width * height > settings.IMAGE_MAX_PIXELS:
+            raise serializers.ValidationError(
+                f'Картинка не может быть больше '
+                f'{settings.IMAGE_MAX_PIXELS} пикселей.'
+            )
+        field = get_image_field()
+        name = field.generate_filename(None, image.name)
+        if field.storage.exists(name):
+            return name
+        return image
+
+    def to_representation(self, file):
+        if not file:
+            return None
+        variant = self.variant or self.context.get('image_variant')
+        url = get_image_url(file.instance, variant)
+        request = self.context.get('request')
+        if request is not None:
+            return request.build_absolute_uri(url)
+        return url
@@ -1,7 +1,50 @@
+from django import forms
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Exists, OuterRef
 from django_filters import rest_framework
+from rest_framework.exceptions import ValidationError
 
+from api.response_cache import get_catalog_version
+from foodgram.db_router import read_from_primary
+from recipes.fulltext import search_recipes
 from recipes.models import Ingredient, Recipe, Tag
 
+TAG_SLUGS_KEY = 'tags:slugs:{}'
+TAGS_MODES = (('any', 'any'), ('all', 'all'))
+
+
+def get_tag_ids(slugs):
+    """Переводит слаги тегов в id по закэшированному словарю.
+
+    Ключ словаря содержит версию каталога, которую сбрасывают сигналы
+    при изменении тегов.
+    """
+    key = TAG_SLUGS_KEY.format(get_catalog_version())
+    tag_ids = cache.get(key)
+    if tag_ids is None:
+        with read_from_primary():
+            tag_ids = dict(Tag.objects.values_list('slug', 'id'))
+        cache.set(key, tag_ids, settings.TAG_SLUGS_CACHE_TIMEOUT)
+    missing = sorted(set(slugs) - tag_ids.keys())
+    if missing:
+        raise ValidationError({
+            'tags': [f'Тега со слагом {slug} не существует.'
+                     for slug in missing]
+        })
+    return {tag_ids[slug] for slug in slugs}
+
+
+class SlugMultipleField(forms.MultipleChoiceField):
+    """Список слагов без проверки по choices, её делает get_tag_ids."""
+
+    def valid_value(self, value):
+        return True
+
+
+class SlugMultipleFilter(rest_framework.MultipleChoiceFilter):
+    field_class = SlugMultipleField
+
 
 class SpecialIngredientFilter(rest_framework.FilterSet):
     name = rest_framework.CharFilter(field_name='name', lookup_expr='contains')
@@ -12,19 +55,39 @@ class SpecialIngredientFilter(rest_framework.FilterSet):
 
 
 class SpecialRecipeFilter(rest_framework.FilterSet):
-    tags = rest_framework.ModelMultipleChoiceFilter(
-        field_name='tags__slug',
-        queryset=Tag.objects.all(),
-        to_field_name='slug',
+    tags = SlugMultipleFilter(method='get_tags')
+    tags_mode = rest_framework.ChoiceFilter(
+        choices=TAGS_MODES,
+        method='get_tags_mode',
     )
     is_favorited = rest_framework.BooleanFilter(method='get_is_favorited')
     is_in_shopping_cart = rest_framework.BooleanFilter(
         method='get_is_in_shopping_cart'
     )
+    search = rest_framework.CharFilter(method='get_search')
 
     class Meta:
         model = Recipe
-        fields = ('tags', 'author', 'is_favorited', 'is_in_shopping_cart')
+        fields = (
+            'tags', 'tags_mode', 'author', 'is_favorited',
+            'is_in_shopping_cart', 'search',
+        )
+
+    def get_tags(self, queryset, name, value):
+        tag_ids = get_tag_ids(value)
+        recipe_tags = Recipe.tags.through.objects.filter(
+            recipe_id=OuterRef('pk'), tag_id__in=tag_ids
+        )
+        if self.form.cleaned_data.get('tags_mode') == 'all':
+            # Один подзапрос с HAVING вместо соединения на каждый тег
+            recipe_tags = recipe_tags.values('recipe_id').annotate(
+                tags_count=Count('tag_id')
+            ).filter(tags_count=len(tag_ids))
+        return queryset.filter(Exists(recipe_tags))
+
+    def get_tags_mode(self, queryset, name, value):
+        # Учитывается в get_tags
+        return queryset
 
     def get_is_favorited(self, queryset, name, value):
         if self.request and self.request.user.is_authenticated and value:
@@ -35,3 +98,8 @@ class SpecialRecipeFilter(rest_framework.FilterSet):
         if self.request and self.request.user.is_authenticated and value:
             return queryset.filter(cart__user=self.request.user)
         return queryset
+
+    def get_search(self, queryset, name, value):
+        if not value.strip():
+            return queryset
+        return search_recipes(queryset, value)
@@ -0,0 +1,142 @@
+import asyncio
+import json
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import AsyncClient, Client, override_settings
+from rest_framework.authtoken.models import Token
+
+from api.management.commands.run_benchmark import percentile
+from recipes.models import Ingredient, Recipe
+from users.models import User
+
+
+def summarize(timings, elapsed):
+    return {
+        'rps': round(len(timings) / elapsed, 1),
+        'p50_ms': round(percentile(timings, 50), 2),
+        'p95_ms': round(percentile(timings, 95), 2),
+        'p99_ms': round(percentile(timings, 99), 2),
+        'mean_ms': round(statistics.mean(timings), 2),
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает пропускную способность и задержки эндпоинтов чтения '
+        'при WSGI (пул потоков) и ASGI (async-вьюхи в одном цикле событий)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500)
+        parser.add_argument('--concurrency', type=int, default=50)
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=4,
+            help='Число потоков, изображающих воркеры WSGI',
+        )
+        parser.add_argument(
+            '--client-delay-ms',
+            type=float,
+            default=0,
+            help='Сколько медленный клиент держит соединение после ответа: '
+                 'в WSGI всё это время занят воркер, в ASGI нет',
+        )
+        parser.add_argument('--output', help='Файл для результата')
+
+    def get_endpoints(self):
+        recipe = Recipe.objects.first()
+        ingredient = Ingredient.objects.first()
+        user = User.objects.order_by('id').first()
+        if recipe is None or ingredient is None or user is None:
+            raise CommandError('Бд пуста, выполните seed_benchmark_data')
+        token, _ = Token.objects.get_or_create(user=user)
+        return (
+            ('recipes', '/api/recipes/', None),
+            ('recipes/{id}', f'/api/recipes/{recipe.id}/', None),
+            ('tags', '/api/tags/', None),
+            (
+                'ingredients?name=',
+                f'/api/ingredients/?name={ingredient.name[:3]}',
+                None,
+            ),
+            ('users/me', '/api/users/me/', f'Token {token.key}'),
+        )
+
+    def run_wsgi(self, url, authorization, total, workers, delay):
+        local = threading.local()
+        extra = {'HTTP_AUTHORIZATION': authorization} if authorization else {}
+
+        def request(submitted):
+            if not hasattr(local, 'client'):
+                local.client = Client()
+            response = local.client.get(url, **extra)
+            if response.status_code != 200:
+                raise CommandError(f'{url}: ответ {response.status_code}')
+            connections.close_all()
+            time.sleep(delay)
+            return (time.perf_counter() - submitted) * 1000
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(request, time.perf_counter())
+                for _ in range(total)
+            ]
+            timings = [future.result() for future in futures]
+        return summarize(timings, time.perf_counter() - started)
+
+    async def run_asgi(self, url, authorization, total, concurrency,
+                       delay):
+        client = AsyncClient()
+        extra = {'authorization': authorization} if authorization else {}
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def request():
+            submitted = time.perf_counter()
+            async with semaphore:
+                response = await client.get(url, **extra)
+                await asyncio.sleep(delay)
+            if response.status_code != 200:
+                raise CommandError(f'{url}: ответ {response.status_code}')
+            return (time.perf_counter() - submitted) * 1000
+
+        started = time.perf_counter()
+        timings = await asyncio.gather(*(request() for _ in range(total)))
+        return summarize(timings, time.perf_counter() - started)
+
+    def handle(self, *args, **options):
+        total = options['requests']
+        if total < 1 or options['concurrency'] < 1 or options['workers'] < 1:
+            raise CommandError('Параметры должны быть больше нуля')
+        endpoints = self.get_endpoints()
+        delay = options['client_delay_ms'] / 1000
+
+        results = {
+            'database': connections['default'].vendor,
+            'requests': total,
+            'concurrency': options['concurrency'],
+            'workers': options['workers'],
+            'client_delay_ms': options['client_delay_ms'],
+            'endpoints': {},
+        }
+        for name, url, authorization in endpoints:
+            wsgi = self.run_wsgi(
+                url, authorization, total, options['workers'], delay
+            )
+            with override_settings(ROOT_URLCONF='foodgram.asgi_urls'):
+                asgi = asyncio.run(self.run_asgi(
+                    url, authorization, total, options['concurrency'], delay
+                ))
+            results['endpoints'][name] = {'wsgi': wsgi, 'asgi': asgi}
+
+        output = json.dumps(results, ensure_ascii=False, indent=2)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                file.write(output)
+        self.stdout.write(output)
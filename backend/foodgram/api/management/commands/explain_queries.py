@@ -0,0 +1,201 @@
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from api.filters import SpecialIngredientFilter
+from api.shopping_cart import get_shopping_cart_queryset
+from api.views import RecipeViewSet, UserViewSet, get_recipes_preview
+from recipes.feed import get_feed
+from recipes.models import (Cart, Favorite, Ingredient, IngredientForRecipe,
+                            Recipe, Tag)
+from users.models import Follow, User
+
+SEQ_SCAN_PATTERNS = {
+    'postgresql': re.compile(r'Seq Scan on (\w+)'),
+    'sqlite': re.compile(r'\bSCAN (\w+)$', re.MULTILINE),
+}
+PAGE_SIZE = 6
+
+
+def make_view(viewset_class, action, user, params=None):
+    request = APIRequestFactory().get('/', params or {})
+    force_authenticate(request, user)
+    view = viewset_class()
+    view.action_map = {'get': action}
+    view.action = action
+    view.args = ()
+    view.kwargs = {}
+    view.format_kwarg = None
+    view.request = view.initialize_request(request)
+    return view
+
+
+class Command(BaseCommand):
+    help = (
+        'Прогоняет запросы API через EXPLAIN и сообщает о последовательных '
+        'сканированиях таблиц'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            type=int,
+            help='id пользователя, от имени которого строятся запросы',
+        )
+
+    def recipe_list(self, user, params=None):
+        view = make_view(RecipeViewSet, 'list', user, params)
+        return view.filter_queryset(view.get_queryset())
+
+    def get_checks(self, user):
+        recipe = Recipe.objects.order_by('-pub_date').first()
+        tag = Tag.objects.first()
+        # Пустой IN не доходит до бд, и плана у такого запроса нет,
+        # поэтому для пустой бд подставляется несуществующий id
+        recipe_ids = list(
+            Recipe.objects.values_list('id', flat=True)[:PAGE_SIZE]
+        ) or [0]
+        author_ids = list(
+            user.follower.values_list('author_id', flat=True)[:PAGE_SIZE]
+        ) or [0]
+        subscriptions = make_view(
+            UserViewSet, 'subscriptions', user, {'recipes_limit': 3}
+        )
+        checks = [
+            ('recipes', self.recipe_list(user)[:PAGE_SIZE], ()),
+            (
+                'recipes?author=',
+                self.recipe_list(user, {'author': user.id})[:PAGE_SIZE],
+                (),
+            ),
+            (
+                'recipes?is_favorited=1',
+                self.recipe_list(user, {'is_favorited': 1})[:PAGE_SIZE],
+                (),
+            ),
+            (
+                'recipes?is_in_shopping_cart=1',
+                self.recipe_list(
+                    user, {'is_in_shopping_cart': 1}
+                )[:PAGE_SIZE],
+                (),
+            ),
+            (
+                'recipes?cursor=',
+                self.recipe_list(user).order_by('-pub_date', '-id').filter(
+                    pub_date__lt=timezone.now()
+                )[:PAGE_SIZE],
+                (),
+            ),
+            (
+                'recipes?search=',
+                self.recipe_list(user, {'search': 'суп'})[:PAGE_SIZE],
+                (),
+            ),
+            (
+                'recipes/feed',
+                get_feed(self.recipe_list(user), user)[:PAGE_SIZE],
+                (),
+            ),
+            (
+                'recipes: prefetch tags',
+                Tag.objects.filter(recipes__in=recipe_ids),
+                (),
+            ),
+            (
+                'recipes: prefetch ingredients',
+                IngredientForRecipe.objects.filter(
+                    recipe_id__in=recipe_ids
+                ).select_related('ingredient'),
+                (),
+            ),
+            (
+                'users/subscriptions',
+                subscriptions.get_subscriptions()[:PAGE_SIZE],
+                (),
+            ),
+            (
+                'users/subscriptions: recipes preview',
+                get_recipes_preview(3).filter(author_id__in=author_ids),
+                (),
+            ),
+            (
+                'recipes/download_shopping_cart',
+                get_shopping_cart_queryset(user),
+                (),
+            ),
+            (
+                'ingredients?name= (фильтр по бд)',
+                SpecialIngredientFilter(
+                    {'name': 'соль'}, queryset=Ingredient.objects.all()
+                ).qs,
+                ('recipes_ingredient', ),
+            ),
+            ('followers of author', Follow.objects.filter(author=user), ()),
+        ]
+        if tag is not None:
+            checks.append((
+                'recipes?tags=',
+                self.recipe_list(user, {'tags': tag.slug})[:PAGE_SIZE],
+                (),
+            ))
+            checks.append((
+                'recipes?tags=&tags_mode=all',
+                self.recipe_list(
+                    user, {'tags': tag.slug, 'tags_mode': 'all'}
+                )[:PAGE_SIZE],
+                (),
+            ))
+        if recipe is not None:
+            checks.extend((
+                ('recipes/{id}', self.recipe_list(user).filter(
+                    pk=recipe.pk
+                ), ()),
+                ('favorites of recipe', Favorite.objects.filter(
+                    recipe=recipe
+                ), ()),
+                ('carts of recipe', Cart.objects.filter(recipe=recipe), ()),
+            ))
+        return checks
+
+    def explain(self, queryset):
+        with transaction.atomic():
+            if connection.vendor == 'postgresql':
+                with connection.cursor() as cursor:
+                    cursor.execute('SET LOCAL enable_seqscan = off')
+            return queryset.explain()
+
+    def handle(self, *args, **options):
+        pattern = SEQ_SCAN_PATTERNS.get(connection.vendor)
+        if pattern is None:
+            raise CommandError(
+                f'База данных {connection.vendor} не поддерживается'
+            )
+        users = User.objects.order_by('id')
+        if options['user']:
+            users = users.filter(id=options['user'])
+        user = users.first()
+        if user is None:
+            raise CommandError('Нет пользователей, сначала заполните бд')
+
+        problems = 0
+        for title, queryset, allowed in self.get_checks(user):
+            plan = self.explain(queryset)
+            scans = set(pattern.findall(plan)) - set(allowed)
+            if scans:
+                problems += 1
+                self.stdout.write(self.style.ERROR(
+                    f'{title}: последовательное сканирование '
+                    f'{", ".join(sorted(scans))}'
+                ))
+            else:
+                self.stdout.write(self.style.SUCCESS(f'{title}: ok'))
+            if options['verbosity'] > 1 or scans:
+                self.stdout.write(plan)
+        if problems:
+            raise CommandError(
+                f'Запросов с последовательным сканированием: {problems}'
+            )
@@ -0,0 +1,138 @@
+import json
+import math
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from recipes.models import Ingredient, Recipe, Tag
+from users.models import User
+
+
+def percentile(values, percent):
+    values = sorted(values)
+    return values[max(0, math.ceil(percent / 100 * len(values)) - 1)]
+
+
+class Command(BaseCommand):
+    help = (
+        'Прогоняет эндпоинты API через тестовый клиент и выводит '
+        'p50/p95/p99 задержки и число запросов к бд в формате JSON'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=50)
+        parser.add_argument('--warmup', type=int, default=3)
+        parser.add_argument(
+            '--user',
+            type=int,
+            help='id пользователя, от имени которого идут запросы',
+        )
+        parser.add_argument('--output', help='Файл для результата')
+
+    def get_user(self, user_id):
+        users = User.objects.filter(follower__isnull=False, cart__isnull=False)
+        if user_id:
+            users = User.objects.filter(id=user_id)
+        user = users.order_by('id').first()
+        if user is None:
+            raise CommandError(
+                'Нет подходящего пользователя, выполните seed_benchmark_data'
+            )
+        return user
+
+    def get_endpoints(self, user):
+        recipe = Recipe.objects.first()
+        tag = Tag.objects.first()
+        ingredient = Ingredient.objects.first()
+        if recipe is None or tag is None or ingredient is None:
+            raise CommandError('Бд пуста, выполните seed_benchmark_data')
+        prefix = ingredient.name[:3]
+        return (
+            ('users', '/api/users/'),
+            ('users/me', '/api/users/me/'),
+            ('users/{id}', f'/api/users/{recipe.author_id}/'),
+            (
+                'users/subscriptions',
+                '/api/users/subscriptions/?recipes_limit=3',
+            ),
+            (
+                'users/subscriptions?cursor=',
+                '/api/users/subscriptions/?recipes_limit=3&cursor=',
+            ),
+            ('tags', '/api/tags/'),
+            ('tags/{id}', f'/api/tags/{tag.id}/'),
+            ('ingredients', '/api/ingredients/'),
+            ('ingredients?name=', f'/api/ingredients/?name={prefix}'),
+            ('ingredients/{id}', f'/api/ingredients/{ingredient.id}/'),
+            ('recipes', '/api/recipes/'),
+            ('recipes?page=last', '/api/recipes/?page=last'),
+            ('recipes?cursor=', '/api/recipes/?cursor='),
+            ('recipes?tags=', f'/api/recipes/?tags={tag.slug}'),
+            ('recipes?author=', f'/api/recipes/?author={user.id}'),
+            ('recipes?is_favorited=1', '/api/recipes/?is_favorited=1'),
+            (
+                'recipes?is_in_shopping_cart=1',
+                '/api/recipes/?is_in_shopping_cart=1',
+            ),
+            ('recipes/{id}', f'/api/recipes/{recipe.id}/'),
+            ('recipes/feed', '/api/recipes/feed/'),
+            (
+                'recipes/download_shopping_cart',
+                '/api/recipes/download_shopping_cart/',
+            ),
+        )
+
+    def measure(self, client, url, iterations, warmup):
+        for _ in range(warmup):
+            client.get(url)
+        timings = []
+        queries = []
+        for _ in range(iterations):
+            with CaptureQueriesContext(connection) as context:
+                started = time.perf_counter()
+                response = client.get(url)
+                if response.streaming:
+                    b''.join(response.streaming_content)
+                timings.append((time.perf_counter() - started) * 1000)
+            if response.status_code != 200:
+                raise CommandError(f'{url}: ответ {response.status_code}')
+            queries.append(len(context.captured_queries))
+        return {
+            'p50_ms': round(percentile(timings, 50), 2),
+            'p95_ms': round(percentile(timings, 95), 2),
+            'p99_ms': round(percentile(timings, 99), 2),
+            'mean_ms': round(statistics.mean(timings), 2),
+            'queries': round(statistics.mean(queries), 2),
+            'max_queries': max(queries),
+        }
+
+    def handle(self, *args, **options):
+        if options['iterations'] < 1:
+            raise CommandError('Число итераций должно быть больше нуля')
+        user = self.get_user(options['user'])
+        token, _ = Token.objects.get_or_create(user=user)
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+
+        results = {
+            'database': connection.vendor,
+            'iterations': options['iterations'],
+            'recipes': Recipe.objects.count(),
+            'users': User.objects.count(),
+            'endpoints': {
+                name: self.measure(
+                    client, url, options['iterations'], options['warmup']
+                )
+                for name, url in self.get_endpoints(user)
+            },
+        }
+        output = json.dumps(results, ensure_ascii=False, indent=2)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                file.write(output)
+        self.stdout.write(output)
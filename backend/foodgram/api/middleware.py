@@ -0,0 +1,201 @@
+import asyncio
+import logging
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.db import connections
+from django.urls import URLPattern, URLResolver
+
+logger = logging.getLogger('api.performance')
+
+_query_counter = ContextVar('query_counter', default=None)
+
+
+class QueryCounter:
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.duration += time.perf_counter() - started
+
+
+class EndpointStats:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def record(self, endpoint, duration, queries, db_duration):
+        with self._lock:
+            stats = self._stats.setdefault(endpoint, {
+                'requests': 0,
+                'total_ms': 0.0,
+                'max_ms': 0.0,
+                'db_ms': 0.0,
+                'queries': 0,
+                'max_queries': 0,
+            })
+            stats['requests'] += 1
+            stats['total_ms'] += duration
+            stats['max_ms'] = max(stats['max_ms'], duration)
+            stats['db_ms'] += db_duration
+            stats['queries'] += queries
+            stats['max_queries'] = max(stats['max_queries'], queries)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                endpoint: {
+                    'requests': stats['requests'],
+                    'avg_ms': round(stats['total_ms'] / stats['requests'], 2),
+                    'max_ms': round(stats['max_ms'], 2),
+                    'avg_db_ms': round(stats['db_ms'] / stats['requests'], 2),
+                    'avg_queries': round(
+                        stats['queries'] / stats['requests'], 2
+                    ),
+                    'max_queries': stats['max_queries'],
+                }
+                for endpoint, stats in sorted(self._stats.items())
+            }
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+
+endpoint_stats = EndpointStats()
+
+
+@contextmanager
+def count_queries(counter):
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(counter))
+        yield
+
+
+def track_queries(func):
+    """Считает запросы синхронного кода, вызванного из async-вьюхи.
+
+    Такой код выполняется в отдельном потоке со своими подключениями
+    к бд, которых PerformanceMiddleware не видит.
+    """
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        counter = _query_counter.get()
+        if counter is None:
+            return func(*args, **kwargs)
+        with count_queries(counter):
+            return func(*args, **kwargs)
+    return wrapper
+
+
+def track_sync_views(patterns):
+    """Копия urlpatterns, где синхронные вьюхи обёрнуты в track_queries.
+
+    Под ASGI Django выполняет синхронные вьюхи в отдельном потоке,
+    и без обёртки их запросы к бд не попали бы в статистику.
+    """
+    tracked = []
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            pattern = URLResolver(
+                pattern.pattern,
+                track_sync_views(pattern.url_patterns),
+                pattern.default_kwargs,
+                pattern.app_name,
+                pattern.namespace,
+            )
+        elif not asyncio.iscoroutinefunction(pattern.callback):
+            pattern = URLPattern(
+                pattern.pattern,
+                track_queries(pattern.callback),
+                pattern.default_args,
+                pattern.name,
+            )
+        tracked.append(pattern)
+    return tracked
+
+
+def get_endpoint_name(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return None
+    view_class = getattr(match.func, 'cls', None)
+    if view_class is None:
+        return match.view_name
+    method = request.method.lower()
+    actions = getattr(match.func, 'actions', None) or {}
+    return f'{view_class.__name__}.{actions.get(method, method)}'
+
+
+class PerformanceMiddleware:
+    """Замеряет время ответа, число и время запросов к бд для каждой вьюхи.
+
+    Результат отдаётся в заголовке Server-Timing, копится в endpoint_stats
+    и пишется в лог, если запрос вышел за PERFORMANCE_QUERY_BUDGET
+    или PERFORMANCE_LATENCY_BUDGET_MS.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            # Как в django.utils.deprecation.MiddlewareMixin
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self):
+            return self.__acall__(request)
+        counter = QueryCounter()
+        started = time.perf_counter()
+        with count_queries(counter):
+            response = self.get_response(request)
+        return self.process(request, response, counter, started)
+
+    async def __acall__(self, request):
+        counter = QueryCounter()
+        started = time.perf_counter()
+        token = _query_counter.set(counter)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _query_counter.reset(token)
+        return self.process(request, response, counter, started)
+
+    def process(self, request, response, counter, started):
+        duration = (time.perf_counter() - started) * 1000
+        db_duration = counter.duration * 1000
+
+        endpoint = get_endpoint_name(request)
+        if endpoint is None:
+            return response
+        endpoint_stats.record(endpoint, duration, counter.count, db_duration)
+        response['Server-Timing'] = (
+            f'total;dur={duration:.1f}, '
+            f'db;dur={db_duration:.1f};desc="{counter.count} queries"'
+        )
+        if (
+            counter.count > settings.PERFORMANCE_QUERY_BUDGET
+            or duration > settings.PERFORMANCE_LATENCY_BUDGET_MS
+        ):
+            logger.warning(
+                '%s %s (%s): %.1f ms, %d queries, %.1f ms in db',
+                request.method, request.get_full_path(), endpoint,
+                duration, counter.count, db_duration,
+            )
+        return response
@@ -1,7 +1,84 @@
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import (BasePagination, CursorPagination,
+                                       PageNumberPagination)
 
 
 class CustomPageNumberPagination(PageNumberPagination):
     page_size = 6
     page_query_param = 'page'
     page_size_query_param = 'limit'
+
+
+class RecipeCursorPagination(CursorPagination):
+    page_size = 6
+    page_size_query_param = 'limit'
+    max_page_size = 100
+    ordering = ('-pub_date', '-id')
+
+
+class IdCursorPagination(RecipeCursorPagination):
+    ordering = ('id', )
+
+
+class FeedCursorPagination(RecipeCursorPagination):
+    """Лента подписок по дате записи ленты и id рецепта, см.
+    recipes.feed.get_feed.
+    """
+    ordering = ('-feed_pub_date', '-id')
+
+
+class PageNumberOrCursorPagination(BasePagination):
+    """Постраничная пагинация, либо курсорная при наличии ?cursor=.
+
+    Курсорный режим не считает COUNT(*) и не использует OFFSET, поэтому
+    дальние страницы стоят столько же, сколько первая. Курсор задаёт
+    свой порядок, поэтому с параметрами из cursor_conflicts, которые
+    сортируют выдачу иначе, он не принимается.
+    """
+    page_number_class = CustomPageNumberPagination
+    cursor_class = None
+    cursor_conflicts = ()
+
+    def __init__(self):
+        self.page_number = self.page_number_class()
+        self.cursor = self.cursor_class()
+        self.current = self.page_number
+
+    def paginate_queryset(self, queryset, request, view=None):
+        params = request.query_params
+        if self.cursor.cursor_query_param in params:
+            conflicts = [name for name in self.cursor_conflicts
+                         if name in params]
+            if conflicts:
+                raise ValidationError({
+                    self.cursor.cursor_query_param: (
+                        'Курсорная пагинация недоступна вместе с '
+                        f'{", ".join(conflicts)}, используйте page.'
+                    )
+                })
+            self.current = self.cursor
+        else:
+            self.current = self.page_number
+        return self.current.paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        return self.current.get_paginated_response(data)
+
+    def get_paginated_response_schema(self, schema):
+        return self.page_number.get_paginated_response_schema(schema)
+
+    def get_schema_operation_parameters(self, view):
+        return (
+            self.page_number.get_schema_operation_parameters(view)
+            + self.cursor.get_schema_operation_parameters(view)
+        )
+
+
+class RecipePagination(PageNumberOrCursorPagination):
+    cursor_class = RecipeCursorPagination
+    # Поиск сортирует по рангу, см. recipes.fulltext
+    cursor_conflicts = ('search', )
+
+
+class UserPagination(PageNumberOrCursorPagination):
+    cursor_class = IdCursorPagination
@@ -0,0 +1,111 @@
+import csv
+import json
+from abc import ABC, abstractmethod
+from tempfile import SpooledTemporaryFile
+
+from django.conf import settings
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.pdfgen import canvas
+from rest_framework.renderers import BaseRenderer
+
+SHOPPING_LIST_TITLE = 'Список ингредиентов для ваших рецептов:'
+PDF_FONT_NAME = 'ShoppingListFont'
+PDF_CHUNK_SIZE = 8192
+# Больше этого PDF пишется во временный файл, а не держится в памяти
+PDF_SPOOL_SIZE = 1024 * 1024
+
+
+class ShoppingCartRenderer(ABC, BaseRenderer):
+    """Базовый рендерер списка покупок.
+
+    Сам список отдаётся по частям через stream(), а render() нужен DRF
+    только для ответов с ошибками.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return json.dumps(data, ensure_ascii=False).encode()
+
+    @abstractmethod
+    def stream(self, ingredients):
+        """Части файла для строк (название, единица, количество)."""
+
+
+class TextShoppingCartRenderer(ShoppingCartRenderer):
+    media_type = 'text/plain'
+    format = 'txt'
+
+    def stream(self, ingredients):
+        yield f'{SHOPPING_LIST_TITLE}\n\n'
+        for name, measurement_unit, amount in ingredients:
+            yield f'{name} ({measurement_unit}) — {amount}\n'
+
+
+class EchoBuffer:
+
+    def write(self, value):
+        return value
+
+
+class CSVShoppingCartRenderer(ShoppingCartRenderer):
+    media_type = 'text/csv'
+    format = 'csv'
+
+    def stream(self, ingredients):
+        writer = csv.writer(EchoBuffer())
+        yield writer.writerow(
+            ('Ингредиент', 'Единица измерения', 'Количество')
+        )
+        for row in ingredients:
+            yield writer.writerow(row)
+
+
+class PDFShoppingCartRenderer(ShoppingCartRenderer):
+    media_type = 'application/pdf'
+    format = 'pdf'
+    charset = None
+
+    def stream(self, ingredients):
+        """PDF нельзя отдавать по страницам: таблица смещений объектов
+        пишется в конце документа, и reportlab собирает его целиком
+        в save(). Поэтому документ пишется в буфер, который при большом
+        размере уходит во временный файл, и уже он отдаётся частями.
+        """
+        if PDF_FONT_NAME not in pdfmetrics.getRegisteredFontNames():
+            pdfmetrics.registerFont(
+                TTFont(PDF_FONT_NAME, settings.SHOPPING_LIST_PDF_FONT)
+            )
+        buffer = SpooledTemporaryFile(max_size=PDF_SPOOL_SIZE)
+        try:
+            self.write(buffer, ingredients)
+        except Exception:
+            buffer.close()
+            raise
+        buffer.seek(0)
+        return self.read_chunks(buffer)
+
+    @staticmethod
+    def write(buffer, ingredients):
+        pdf = canvas.Canvas(buffer, pagesize=A4)
+        width, height = A4
+        top, bottom, left, line_height = height - 50, 50, 50, 20
+        pdf.setFont(PDF_FONT_NAME, 16)
+        pdf.drawString(left, top, SHOPPING_LIST_TITLE)
+        y = top - 2 * line_height
+        pdf.setFont(PDF_FONT_NAME, 12)
+        for name, measurement_unit, amount in ingredients:
+            if y < bottom:
+                pdf.showPage()
+                pdf.setFont(PDF_FONT_NAME, 12)
+                y = top
+            pdf.drawString(
+                left, y, f'{name} ({measurement_unit}) — {amount}'
+            )
+            y -= line_height
+        pdf.save()
+
+    @staticmethod
+    def read_chunks(buffer):
+        with buffer:
+            yield from iter(lambda: buffer.read(PDF_CHUNK_SIZE), b'')
@@ -0,0 +1,124 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.http import urlencode
+from rest_framework.response import Response
+
+from foodgram.db_router import read_from_primary
+from foodgram.versions import aget_version, bump_versions, get_version
+
+RECIPES_VERSION_KEY = 'recipes:version'
+RECIPE_VERSION_KEY = 'recipes:version:{}'
+CATALOG_VERSION_KEY = 'recipes:catalog_version'
+# Отметки пользователя: избранное, корзина, подписки
+USER_STATE_VERSION_KEY = 'recipes:user_state_version:{}'
+RECIPE_LIST_KEY = 'recipes:list_response:{}:{}:{}'
+RECIPE_DETAIL_KEY = 'recipes:detail_response:{}:{}'
+# Параметры, от которых зависит ответ анонимному пользователю,
+# остальные (is_favorited, is_in_shopping_cart и т.п.) на него не влияют
+LIST_PARAMS = (
+    'page', 'limit', 'tags', 'tags_mode', 'author', 'cursor', 'search'
+)
+
+
+def bump_recipe_version(*recipe_ids):
+    bump_versions(
+        RECIPES_VERSION_KEY,
+        *[RECIPE_VERSION_KEY.format(id) for id in recipe_ids],
+    )
+
+
+def bump_catalog_version():
+    bump_versions(RECIPES_VERSION_KEY, CATALOG_VERSION_KEY)
+
+
+def bump_user_state_version(*user_ids):
+    bump_versions(*[USER_STATE_VERSION_KEY.format(id) for id in user_ids])
+
+
+def is_cacheable(request):
+    return request.method == 'GET' and not request.user.is_authenticated
+
+
+def get_list_version_keys(user=None):
+    """Ключи версий, от которых зависит список рецептов для user."""
+    keys = [RECIPES_VERSION_KEY]
+    if user is not None and user.is_authenticated:
+        keys.append(USER_STATE_VERSION_KEY.format(user.pk))
+    return keys
+
+
+def get_detail_version_keys(pk, user=None):
+    keys = [RECIPE_VERSION_KEY.format(pk), CATALOG_VERSION_KEY]
+    if user is not None and user.is_authenticated:
+        keys.append(USER_STATE_VERSION_KEY.format(user.pk))
+    return keys
+
+
+def get_versions(keys):
+    return [get_version(key) for key in keys]
+
+
+async def aget_versions(keys):
+    return [await aget_version(key) for key in keys]
+
+
+def normalize_query(request):
+    params = request.GET
+    return urlencode(
+        [(name, sorted(params.getlist(name))) for name in LIST_PARAMS
+         if name in params],
+        doseq=True,
+    )
+
+
+def make_list_key(request, versions):
+    return RECIPE_LIST_KEY.format(
+        ':'.join(versions),
+        request.build_absolute_uri(request.path),
+        normalize_query(request),
+    )
+
+
+def make_detail_key(request, versions):
+    return RECIPE_DETAIL_KEY.format(
+        ':'.join(versions),
+        request.build_absolute_uri(request.path),
+    )
+
+
+def get_catalog_version():
+    return get_version(CATALOG_VERSION_KEY)
+
+
+async def aget_list_key(request):
+    return make_list_key(
+        request, await aget_versions(get_list_version_keys())
+    )
+
+
+async def aget_detail_key(request, pk):
+    return make_detail_key(
+        request, await aget_versions(get_detail_version_keys(pk))
+    )
+
+
+def cached_response(key, build, validators):
+    """Отдаёт ответ из кэша или строит его через build.
+
+    В кэш попадают только данные успешных ответов, рендерятся они
+    заново, поэтому формат по-прежнему выбирается по Accept. Вместе
+    с данными хранятся validators (ETag и Last-Modified ответа в JSON),
+    их отдаёт async-вьюха, отвечая из кэша.
+    """
+    entry = cache.get(key)
+    if entry is not None:
+        return Response(entry['data'])
+    with read_from_primary():
+        response = build()
+    if response.status_code == 200:
+        cache.set(
+            key,
+            {'data': response.data, **validators},
+            settings.RECIPES_CACHE_TIMEOUT,
+        )
+    return response
@@ -1,15 +1,50 @@
 from django.contrib.auth import get_user_model
 from django.contrib.auth.password_validation import validate_password
-from django.shortcuts import get_object_or_404
+from django.db import transaction
+from django.db.models import Prefetch, prefetch_related_objects
 from djoser.serializers import UserSerializer
-from drf_extra_fields.fields import Base64ImageField
 from rest_framework import serializers
 
+from api.fields import RecipeImageField
+from recipes.images import get_image_url, variants_ready
 from recipes.models import Ingredient, IngredientForRecipe, Recipe, Tag
 from users.models import Follow
 
 User = get_user_model()
 
+RECIPES_LIMIT_MAX = 50
+RECIPES_BATCH_MAX = 100
+SERVINGS_MAX = 100
+
+
+def get_recipe_prefetches():
+    return (
+        'tags',
+        Prefetch(
+            'ingredient_for_recipe',
+            queryset=IngredientForRecipe.objects.select_related('ingredient'),
+        ),
+    )
+
+
+def get_recipes_limit(request):
+    if request is None:
+        return RECIPES_LIMIT_MAX
+    recipes_limit = request.query_params.get('recipes_limit')
+    if recipes_limit is None:
+        return RECIPES_LIMIT_MAX
+    try:
+        recipes_limit = int(recipes_limit)
+    except ValueError:
+        raise serializers.ValidationError(
+            {'recipes_limit': 'Должно быть число.'}
+        )
+    if recipes_limit < 0:
+        raise serializers.ValidationError(
+            {'recipes_limit': 'Не может быть меньше нуля.'}
+        )
+    return min(recipes_limit, RECIPES_LIMIT_MAX)
+
 
 class CustomUserSerializer(UserSerializer):
     is_subscribed = serializers.SerializerMethodField()
@@ -23,6 +58,8 @@ class CustomUserSerializer(UserSerializer):
         extra_kwargs = {'password': {'write_only': True}}
 
     def get_is_subscribed(self, obj):
+        if hasattr(obj, 'is_subscribed'):
+            return obj.is_subscribed
         user = self.context['request'].user
         return (
             user.is_authenticated
@@ -55,6 +92,7 @@ class NewPasswordSerializer(serializers.ModelSerializer):
 
 
 class RecipeFollowSerializer(serializers.ModelSerializer):
+    image = RecipeImageField(read_only=True, variant='card')
 
     class Meta:
         model = Recipe
@@ -87,19 +125,41 @@ class FollowSerializer(serializers.ModelSerializer):
         return data
 
     def get_is_subscribed(self, obj):
-        return obj.user.follower.filter(author=obj.author).exists()
+        # Сама подписка и есть доказательство того, что пользователь
+        # подписан на автора.
+        return True
 
     def get_recipes(self, obj):
-        request = self.context.get('request')
-        queryset = obj.author.recipes.all()
-        if request:
-            recipes_limit = request.GET.get('recipes_limit')
-            if recipes_limit is not None:
-                queryset = queryset[:int(recipes_limit)]
+        queryset = getattr(obj.author, 'recipes_preview', None)
+        if queryset is None:
+            recipes_limit = get_recipes_limit(self.context.get('request'))
+            queryset = obj.author.recipes.all()[:recipes_limit]
         return [RecipeFollowSerializer(item).data for item in queryset]
 
     def get_recipes_count(self, obj):
-        return obj.author.recipes.count()
+        return obj.author.recipes_count
+
+
+class TagListSerializer(serializers.ListSerializer):
+
+    def to_internal_value(self, data):
+        if not isinstance(data, list):
+            raise serializers.ValidationError('Ожидался список id тегов.')
+        if not data:
+            raise serializers.ValidationError(
+                'Должен быть как минимум один тег.'
+            )
+        if not all(
+            isinstance(id, int) and not isinstance(id, bool) for id in data
+        ):
+            raise serializers.ValidationError('Должно быть число')
+        tags = Tag.objects.in_bulk(data)
+        missing = sorted(set(data) - tags.keys())
+        if missing:
+            raise serializers.ValidationError(
+                f'Тегов с id {missing} не существует.'
+            )
+        return [tags[id] for id in data]
 
 
 class TagSerializer(serializers.ModelSerializer):
@@ -107,16 +167,7 @@ class TagSerializer(serializers.ModelSerializer):
     class Meta:
         model = Tag
         fields = '__all__'
-
-    def to_internal_value(self, id):
-        if not id:
-            raise serializers.ValidationError({
-                'tags': 'Должен быть как минимум один тег.'
-            })
-        if not isinstance(id, int):
-            raise serializers.ValidationError(
-                'Должно быть число')
-        return get_object_or_404(Tag, id=id)
+        list_serializer_class = TagListSerializer
 
 
 class IngredientSerializer(serializers.ModelSerializer):
@@ -145,7 +196,8 @@ class RecipeSerializer(serializers.ModelSerializer):
         source='ingredient_for_recipe',
         many=True,
     )
-    image = Base64ImageField()
+    image = RecipeImageField()
+    image_variants = serializers.SerializerMethodField()
     is_favorited = serializers.SerializerMethodField()
     is_in_shopping_cart = serializers.SerializerMethodField()
 
@@ -153,18 +205,38 @@ class RecipeSerializer(serializers.ModelSerializer):
         model = Recipe
         fields = ('id', 'tags', 'author', 'ingredients',
                   'is_favorited', 'is_in_shopping_cart',
-                  'name', 'image', 'text', 'cooking_time')
+                  'name', 'image', 'image_variants', 'text', 'cooking_time')
+
+    def to_representation(self, instance):
+        prefetch_related_objects([instance], *get_recipe_prefetches())
+        if hasattr(instance, 'author_is_subscribed'):
+            instance.author.is_subscribed = instance.author_is_subscribed
+        return super().to_representation(instance)
+
+    def get_image_variants(self, obj):
+        if not variants_ready(obj):
+            return {}
+        request = self.context.get('request')
+        return {
+            variant: request.build_absolute_uri(get_image_url(obj, variant))
+            for variant in obj.image_variants
+            if variant != 'source'
+        }
 
     def get_is_favorited(self, obj):
         user = self.context.get('request').user
         if user.is_anonymous:
             return False
+        if hasattr(obj, 'is_favorited'):
+            return obj.is_favorited
         return obj.favorite.filter(user=user).exists()
 
     def get_is_in_shopping_cart(self, obj):
         user = self.context.get('request').user
         if user.is_anonymous:
             return False
+        if hasattr(obj, 'is_in_shopping_cart'):
+            return obj.is_in_shopping_cart
         return obj.cart.filter(user=user).exists()
 
     def validate_tags(self, value):
@@ -174,15 +246,71 @@ class RecipeSerializer(serializers.ModelSerializer):
                 'Не может быть два одинаковых тега')
         return value
 
+    def validate_ingredients(self, value):
+        if not value:
+            raise serializers.ValidationError(
+                'Должен быть как минимум один ингредиент.'
+            )
+        ids = [ingredient['ingredient']['id'] for ingredient in value]
+        if len(set(ids)) < len(ids):
+            raise serializers.ValidationError(
+                'Не может быть два одинаковых ингредиента')
+        existing = set(
+            Ingredient.objects.filter(id__in=ids).values_list('id', flat=True)
+        )
+        missing = sorted(set(ids) - existing)
+        if missing:
+            raise serializers.ValidationError(
+                f'Ингредиентов с id {missing} не существует.'
+            )
+        return value
+
     @staticmethod
     def create_ingridients(ingredients, recipe):
-        for ingredient in ingredients:
-            IngredientForRecipe.objects.create(
+        IngredientForRecipe.objects.bulk_create(
+            IngredientForRecipe(
                 recipe=recipe,
                 ingredient_id=ingredient['ingredient']['id'],
                 amount=ingredient['amount'],
             )
+            for ingredient in ingredients
+        )
 
+    @staticmethod
+    def update_ingredients(ingredients, recipe):
+        amounts = {
+            ingredient['ingredient']['id']: ingredient['amount']
+            for ingredient in ingredients
+        }
+        current = {
+            item.ingredient_id: item
+            for item in recipe.ingredient_for_recipe.all()
+        }
+        removed = current.keys() - amounts.keys()
+        if removed:
+            # Кэши рецепта уже сбросило его сохранение, поэтому строки
+            # удаляются без выборки и без post_delete на каждую
+            queryset = IngredientForRecipe.objects.filter(
+                recipe=recipe, ingredient_id__in=removed
+            )
+            queryset._raw_delete(queryset.db)
+        changed = []
+        for ingredient_id, item in current.items():
+            amount = amounts.get(ingredient_id)
+            if amount is not None and item.amount != amount:
+                item.amount = amount
+                changed.append(item)
+        if changed:
+            IngredientForRecipe.objects.bulk_update(changed, ['amount'])
+        RecipeSerializer.create_ingridients(
+            [
+                ingredient for ingredient in ingredients
+                if ingredient['ingredient']['id'] not in current
+            ],
+            recipe,
+        )
+
+    @transaction.atomic
     def create(self, validated_data):
         author = self.context['request'].user
         ingredients = validated_data.pop('ingredient_for_recipe')
@@ -192,26 +320,53 @@ class RecipeSerializer(serializers.ModelSerializer):
         recipe.tags.set(tags)
         return recipe
 
+    @transaction.atomic
     def update(self, instance, validated_data):
-        ingredients = validated_data.pop('ingredient_for_recipe')
-        tags = validated_data.pop('tags')
-        Recipe.objects.filter(id=instance.id).update(**validated_data)
-        recipe = get_object_or_404(Recipe, id=instance.id)
-        recipe.tags.remove()
-        recipe_ingredients = IngredientForRecipe.objects.filter(
-            recipe_id=instance.id
-            )
-        recipe_ingredients.delete()
-        self.create_ingridients(ingredients, recipe)
-        recipe.tags.set(tags)
-        if validated_data.get('image'):
-            recipe.image = validated_data.get('image')
-            recipe.save()
-        return recipe
+        ingredients = validated_data.pop('ingredient_for_recipe', None)
+        tags = validated_data.pop('tags', None)
+        for attr, value in validated_data.items():
+            setattr(instance, attr, value)
+        instance.save()
+        if ingredients is not None:
+            self.update_ingredients(ingredients, instance)
+        if tags is not None:
+            instance.tags.set(tags)
+        return instance
 
 
 class RecipeCartSerializer(serializers.ModelSerializer):
+    image = RecipeImageField(read_only=True, variant='card')
 
     class Meta:
         model = Recipe
         fields = ('id', 'name', 'image', 'cooking_time')
+
+
+class CartServingsSerializer(serializers.Serializer):
+    servings = serializers.IntegerField(
+        min_value=1, max_value=SERVINGS_MAX, default=1
+    )
+
+
+class RecipeIdsSerializer(serializers.Serializer):
+    recipes = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=RECIPES_BATCH_MAX,
+        error_messages={
+            'max_length': (
+                f'Не больше {RECIPES_BATCH_MAX} рецептов за один запрос.'
+            ),
+        },
+    )
+
+    def validate_recipes(self, value):
+        return list(dict.fromkeys(value))
+
+
+class MoveFavoritesSerializer(RecipeIdsSerializer):
+    remove_from_favorite = serializers.BooleanField(default=False)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['recipes'].required = False
@@ -0,0 +1,56 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import BigIntegerField, F, Sum
+from django.db.models.functions import Cast
+
+from foodgram.db_router import read_from_primary
+from foodgram.versions import bump_versions, get_version
+from recipes.models import IngredientForRecipe
+from recipes.units import base_unit, unit_factor
+
+CART_VERSION_KEY = 'shopping_cart:version:{}'
+SHOPPING_CART_VERSION_KEY = 'shopping_cart:version'
+SHOPPING_CART_KEY = 'shopping_cart:{}:{}:{}'
+
+
+def bump_cart_version(*user_ids):
+    bump_versions(*[CART_VERSION_KEY.format(id) for id in user_ids])
+
+
+def bump_shopping_cart_version():
+    bump_versions(SHOPPING_CART_VERSION_KEY)
+
+
+def get_shopping_cart_queryset(user):
+    """Список покупок одним запросом: количества переводятся в базовые
+    единицы, умножаются на число порций из корзины и суммируются
+    по названию и базовой единице, так что «мука (кг)» и «мука (г)»
+    из каталога складываются в одну строку.
+    """
+    unit = 'ingredient__measurement_unit'
+    return IngredientForRecipe.objects.filter(
+        recipe__cart__user=user
+    ).values(
+        name=F('ingredient__name'),
+        unit=base_unit(unit),
+    ).annotate(
+        total=Sum(
+            Cast('amount', BigIntegerField())
+            * F('recipe__cart__servings')
+            * unit_factor(unit)
+        ),
+    ).values_list('name', 'unit', 'total').order_by('name', 'unit')
+
+
+def get_shopping_cart(user):
+    key = SHOPPING_CART_KEY.format(
+        user.id,
+        get_version(CART_VERSION_KEY.format(user.id)),
+        get_version(SHOPPING_CART_VERSION_KEY),
+    )
+    ingredients = cache.get(key)
+    if ingredients is None:
+        with read_from_primary():
+            ingredients = list(get_shopping_cart_queryset(user))
+        cache.set(key, ingredients, settings.SHOPPING_CART_CACHE_TIMEOUT)
+    return ingredients
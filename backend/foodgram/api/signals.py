@@ -0,0 +1,168 @@
+from django.db import transaction
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_save)
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from api import response_cache
+from api.authentication import revoke_user_tokens
+from api.shopping_cart import bump_cart_version, bump_shopping_cart_version
+from foodgram.counters import is_deleting
+from recipes.bulk import recipes_bulk_changed
+from recipes.images import image_variants_ready
+from recipes.models import (Cart, Favorite, Ingredient, IngredientForRecipe,
+                            Recipe, Tag)
+from users.models import Follow, User
+
+# Поля автора, которые выводятся в ответах с рецептами
+AUTHOR_FIELDS = ('username', 'first_name', 'last_name', 'email')
+
+
+@receiver([post_save, post_delete], sender=Cart)
+def invalidate_user_shopping_cart(sender, instance, **kwargs):
+    transaction.on_commit(lambda: bump_cart_version(instance.user_id))
+
+
+@receiver(recipes_bulk_changed, sender=Cart)
+def invalidate_user_shopping_cart_bulk(sender, user_id, **kwargs):
+    transaction.on_commit(lambda: bump_cart_version(user_id))
+
+
+@receiver(post_save, sender=Recipe)
+def invalidate_recipe_shopping_carts(sender, instance, created, **kwargs):
+    if created:
+        return
+    user_ids = list(instance.cart.values_list('user_id', flat=True))
+    if user_ids:
+        transaction.on_commit(lambda: bump_cart_version(*user_ids))
+
+
+@receiver([post_save, post_delete], sender=Ingredient)
+def invalidate_all_shopping_carts(sender, **kwargs):
+    transaction.on_commit(bump_shopping_cart_version)
+
+
+@receiver([post_save, post_delete], sender=Recipe)
+def invalidate_recipe_responses(sender, instance, **kwargs):
+    recipe_id = instance.pk
+    transaction.on_commit(
+        lambda: response_cache.bump_recipe_version(recipe_id)
+    )
+
+
+@receiver([post_save, post_delete], sender=IngredientForRecipe)
+def invalidate_recipe_ingredient_responses(sender, instance, **kwargs):
+    # Сериализатор пишет строки пачками без сигналов и сохраняет сам
+    # рецепт, сюда приходят правки строк из админки и shell. При удалении
+    # рецепта кэши сбросит он сам
+    if is_deleting(Recipe):
+        return
+    recipe_id = instance.recipe_id
+
+    def bump():
+        response_cache.bump_recipe_version(recipe_id)
+        user_ids = list(
+            Cart.objects.filter(recipe_id=recipe_id).values_list(
+                'user_id', flat=True
+            )
+        )
+        if user_ids:
+            bump_cart_version(*user_ids)
+
+    transaction.on_commit(bump)
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def invalidate_recipe_tags_responses(sender, instance, action, reverse,
+                                     **kwargs):
+    if not action.startswith('post_'):
+        return
+    if reverse:
+        transaction.on_commit(response_cache.bump_catalog_version)
+        return
+    recipe_id = instance.pk
+    transaction.on_commit(
+        lambda: response_cache.bump_recipe_version(recipe_id)
+    )
+
+
+@receiver([post_save, post_delete], sender=Favorite)
+@receiver([post_save, post_delete], sender=Cart)
+@receiver([post_save, post_delete], sender=Follow)
+def invalidate_user_state_responses(sender, instance, **kwargs):
+    user_id = instance.user_id
+    transaction.on_commit(
+        lambda: response_cache.bump_user_state_version(user_id)
+    )
+
+
+@receiver(recipes_bulk_changed)
+def invalidate_user_state_responses_bulk(sender, user_id, **kwargs):
+    transaction.on_commit(
+        lambda: response_cache.bump_user_state_version(user_id)
+    )
+
+
+@receiver(image_variants_ready, sender=Recipe)
+def invalidate_recipe_image_responses(sender, recipe_id, **kwargs):
+    transaction.on_commit(
+        lambda: response_cache.bump_recipe_version(recipe_id)
+    )
+
+
+@receiver([post_save, post_delete], sender=Tag)
+@receiver([post_save, post_delete], sender=Ingredient)
+def invalidate_catalog_responses(sender, **kwargs):
+    transaction.on_commit(response_cache.bump_catalog_version)
+
+
+@receiver(pre_save, sender=User)
+def detect_author_changes(sender, instance, update_fields=None, raw=False,
+                          using=None, **kwargs):
+    # Ответы с рецептами зависят только от этих полей автора, а удаление
+    # автора сбрасывает кэш через удаление его рецептов
+    instance._author_recipe_ids = []
+    if raw or instance.pk is None:
+        return
+    fields = [
+        field for field in AUTHOR_FIELDS
+        if update_fields is None or field in update_fields
+    ]
+    if not fields:
+        return
+    old = User.objects.using(using).filter(
+        pk=instance.pk
+    ).values_list(*fields).first()
+    if old is None or old == tuple(
+        getattr(instance, field) for field in fields
+    ):
+        return
+    instance._author_recipe_ids = list(
+        Recipe.objects.using(using).filter(
+            author_id=instance.pk
+        ).values_list('pk', flat=True)
+    )
+
+
+@receiver(post_save, sender=User)
+def invalidate_author_responses(sender, instance, **kwargs):
+    recipe_ids = getattr(instance, '_author_recipe_ids', None)
+    if recipe_ids:
+        transaction.on_commit(
+            lambda: response_cache.bump_recipe_version(*recipe_ids)
+        )
+
+
+@receiver([post_save, post_delete], sender=Token)
+def revoke_cached_token(sender, instance, **kwargs):
+    user_id = instance.user_id
+    transaction.on_commit(lambda: revoke_user_tokens(user_id))
+
+
+@receiver([post_save, post_delete], sender=User)
+def revoke_cached_user_tokens(sender, instance, update_fields=None,
+                              **kwargs):
+    if update_fields and set(update_fields) <= {'last_login'}:
+        return
+    user_id = instance.pk
+    transaction.on_commit(lambda: revoke_user_tokens(user_id))
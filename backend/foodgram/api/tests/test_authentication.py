@@ -0,0 +1,63 @@
+import time
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from api.authentication import token_cache
+from users.models import User
+
+ME_URL = '/api/users/me/'
+
+
+class CachedTokenAuthenticationTests(TestCase):
+    """Отозванный токен перестаёт работать со следующего запроса,
+    даже если он уже лежит в кэше процесса.
+    """
+
+    def setUp(self):
+        cache.clear()
+        token_cache.clear()
+        self.user = User.objects.create_user(
+            username='user', email='user@example.com', password='password'
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        self.assertEqual(self.client.get(ME_URL).status_code, 200)
+        self.assertIsNotNone(token_cache.get(self.token.key))
+
+    def test_cached_token_skips_token_query(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.get(ME_URL).status_code, 200)
+        self.assertFalse(
+            [query for query in queries if 'authtoken_token' in query['sql']]
+        )
+
+    def test_logout_revokes_cached_token(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/auth/token/logout/')
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(self.client.get(ME_URL).status_code, 401)
+
+    def test_deactivation_revokes_cached_token(self):
+        self.user.is_active = False
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save()
+        self.assertEqual(self.client.get(ME_URL).status_code, 401)
+
+    def test_queryset_update_is_not_revoked_until_ttl(self):
+        # QuerySet.update() не отправляет post_save, поэтому версия
+        # пользователя не меняется и токен работает до конца TTL
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        self.assertEqual(self.client.get(ME_URL).status_code, 200)
+        expired = time.monotonic() + settings.TOKEN_CACHE_TTL
+        with mock.patch(
+            'api.authentication.time.monotonic', return_value=expired
+        ):
+            self.assertEqual(self.client.get(ME_URL).status_code, 401)
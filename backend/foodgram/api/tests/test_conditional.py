@@ -0,0 +1,130 @@
+import time
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils.http import parse_http_date
+from rest_framework.test import APIClient
+
+from recipes.models import Ingredient, IngredientForRecipe, Recipe, Tag
+from users.models import User
+
+
+class RecipeConditionalTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(
+            username='author', email='author@example.com',
+            password='password', first_name='Иван',
+        )
+        self.tag = Tag.objects.create(name='завтрак', color='#fff', slug='b')
+        self.recipe = Recipe.objects.create(
+            author=self.author, name='рецепт', text='текст', cooking_time=5
+        )
+        self.recipe.tags.set([self.tag])
+        self.client = APIClient()
+
+    def assert_not_modified(self, url, response):
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                self.client.get(
+                    url, HTTP_IF_NONE_MATCH=response['ETag']
+                ).status_code,
+                304,
+            )
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                self.client.get(
+                    url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+                ).status_code,
+                304,
+            )
+
+    def assert_modified(self, url, response):
+        self.assertEqual(
+            self.client.get(
+                url, HTTP_IF_NONE_MATCH=response['ETag']
+            ).status_code,
+            200,
+        )
+
+    def test_list_and_detail_not_modified_without_queries(self):
+        for url in ('/api/recipes/', f'/api/recipes/{self.recipe.pk}/'):
+            with self.subTest(url=url):
+                self.assert_not_modified(url, self.client.get(url))
+
+    def test_tag_rename_changes_validators(self):
+        for url in ('/api/recipes/', f'/api/recipes/{self.recipe.pk}/'):
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.tag.name = f'{self.tag.name}!'
+                with self.captureOnCommitCallbacks(execute=True):
+                    self.tag.save()
+                self.assert_modified(url, response)
+
+    def test_last_modified_is_time_of_change(self):
+        url = f'/api/recipes/{self.recipe.pk}/'
+        self.client.get(url)
+        time.sleep(1)
+        before = int(time.time())
+        self.recipe.name = 'новое название'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.recipe.save()
+        after = int(time.time())
+        # Время изменения, а не первого чтения после него
+        time.sleep(1)
+        last_modified = parse_http_date(self.client.get(url)['Last-Modified'])
+        self.assertGreaterEqual(last_modified, before)
+        self.assertLessEqual(last_modified, after)
+
+    def test_ingredient_row_change_changes_validators(self):
+        ingredient = Ingredient.objects.create(
+            name='соль', measurement_unit='г'
+        )
+        row = IngredientForRecipe.objects.create(
+            recipe=self.recipe, ingredient=ingredient, amount=1
+        )
+        for url in ('/api/recipes/', f'/api/recipes/{self.recipe.pk}/'):
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                row.amount += 1
+                with self.captureOnCommitCallbacks(execute=True):
+                    row.save()
+                self.assert_modified(url, response)
+        detail = self.client.get(f'/api/recipes/{self.recipe.pk}/')
+        self.assertEqual(detail.data['ingredients'][0]['amount'], 3)
+        with self.captureOnCommitCallbacks(execute=True):
+            row.delete()
+        detail = self.client.get(f'/api/recipes/{self.recipe.pk}/')
+        self.assertEqual(detail.data['ingredients'], [])
+
+    def test_author_rename_changes_validators(self):
+        # Сохранение устаревшего экземпляра автора пишет в бд и его
+        # счётчики, проверка не должна на них полагаться
+        for url in ('/api/recipes/', f'/api/recipes/{self.recipe.pk}/'):
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.author.first_name = f'{self.author.first_name}!'
+                with self.captureOnCommitCallbacks(execute=True):
+                    self.author.save()
+                self.assert_modified(url, response)
+
+    def test_author_password_change_keeps_validators(self):
+        url = f'/api/recipes/{self.recipe.pk}/'
+        response = self.client.get(url)
+        self.author.set_password('new-password')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.author.save()
+        self.assert_not_modified(url, response)
+
+    def test_user_marks_change_validators(self):
+        user = User.objects.create_user(
+            username='user', email='user@example.com', password='password'
+        )
+        self.client.force_authenticate(user)
+        url = f'/api/recipes/{self.recipe.pk}/'
+        response = self.client.get(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f'{url}favorite/')
+        self.assert_modified(url, response)
+        self.assertTrue(self.client.get(url).data['is_favorited'])
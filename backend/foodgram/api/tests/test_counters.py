@@ -0,0 +1,135 @@
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from recipes.management.commands.recount import COUNTERS, count_subquery
+from recipes.models import Cart, Favorite, Recipe
+from users.models import Follow, User
+
+
+class CountersTests(TestCase):
+    """Счётчики сходятся с COUNT по связям после любых путей изменения."""
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(
+            username='author', email='author@example.com',
+            password='password',
+        )
+        self.users = [
+            User.objects.create_user(
+                username=f'user{number}', email=f'user{number}@example.com',
+                password='password',
+            )
+            for number in range(2)
+        ]
+        self.recipes = [
+            Recipe.objects.create(
+                author=self.author, name=f'рецепт {number}', text='текст',
+                cooking_time=5,
+            )
+            for number in range(3)
+        ]
+        self.recipe_ids = [recipe.pk for recipe in self.recipes]
+
+    def client_for(self, user):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client
+
+    def assert_counters(self):
+        for model, counter, related_model, field in COUNTERS:
+            with self.subTest(counter=f'{model.__name__}.{counter}'):
+                wrong = model.objects.exclude(
+                    **{counter: count_subquery(related_model, field)}
+                ).values_list('pk', counter)
+                self.assertEqual(list(wrong), [])
+
+    def fill(self):
+        for user in self.users:
+            Favorite.objects.create(user=user, recipe=self.recipes[0])
+            Cart.objects.create(user=user, recipe=self.recipes[1])
+            Follow.objects.create(user=user, author=self.author)
+        Follow.objects.create(user=self.author, author=self.users[0])
+
+    def test_toggles(self):
+        recipe = self.recipes[0]
+        for user in self.users:
+            client = self.client_for(user)
+            for url in (
+                f'/api/recipes/{recipe.pk}/favorite/',
+                f'/api/recipes/{recipe.pk}/shopping_cart/',
+                f'/api/users/{self.author.pk}/subscribe/',
+            ):
+                self.assertEqual(client.post(url).status_code, 201)
+                self.assertEqual(client.post(url).status_code, 400)
+        self.assert_counters()
+        recipe.refresh_from_db()
+        self.author.refresh_from_db()
+        self.assertEqual(recipe.favorites_count, 2)
+        self.assertEqual(recipe.in_carts_count, 2)
+        self.assertEqual(self.author.followers_count, 2)
+        client = self.client_for(self.users[0])
+        for url in (
+            f'/api/recipes/{recipe.pk}/favorite/',
+            f'/api/recipes/{recipe.pk}/shopping_cart/',
+            f'/api/users/{self.author.pk}/subscribe/',
+        ):
+            self.assertEqual(client.delete(url).status_code, 204)
+            self.assertEqual(client.delete(url).status_code, 400)
+        self.assert_counters()
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.favorites_count, 1)
+
+    def test_batches(self):
+        client = self.client_for(self.users[0])
+        for url, recipe_ids in (
+            ('/api/recipes/favorite/', self.recipe_ids),
+            ('/api/recipes/shopping_cart/', self.recipe_ids[:2]),
+        ):
+            response = client.post(
+                url, {'recipes': recipe_ids}, format='json'
+            )
+            self.assertEqual(response.status_code, 200)
+        self.assert_counters()
+        response = client.post(
+            '/api/recipes/favorite/to_shopping_cart/',
+            {'remove_from_favorite': True}, format='json',
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assert_counters()
+        self.assertEqual(
+            Recipe.objects.get(pk=self.recipe_ids[2]).in_carts_count, 1
+        )
+        for url in ('/api/recipes/shopping_cart/', '/api/recipes/favorite/'):
+            response = client.delete(
+                url, {'recipes': self.recipe_ids}, format='json'
+            )
+            self.assertEqual(response.status_code, 200)
+        self.assert_counters()
+        self.assertFalse(
+            Recipe.objects.exclude(favorites_count=0, in_carts_count=0)
+        )
+
+    def test_recipe_delete(self):
+        self.fill()
+        response = self.client_for(self.author).delete(
+            f'/api/recipes/{self.recipes[0].pk}/'
+        )
+        self.assertEqual(response.status_code, 204)
+        self.assert_counters()
+        Recipe.objects.filter(pk=self.recipes[1].pk).delete()
+        self.assert_counters()
+        self.author.refresh_from_db()
+        self.assertEqual(self.author.recipes_count, 1)
+
+    def test_user_delete(self):
+        self.fill()
+        Follow.objects.create(user=self.author, author=self.users[1])
+        self.users[0].delete()
+        self.assert_counters()
+        self.author.delete()
+        self.assert_counters()
+        self.assertFalse(Recipe.objects.exists())
+        self.users[1].refresh_from_db()
+        self.assertEqual(self.users[1].followers_count, 0)
@@ -0,0 +1,104 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from recipes.models import FeedItem, Recipe
+from users.models import Follow, User
+
+
+def create_user(username):
+    return User.objects.create_user(
+        username=username, email=f'{username}@example.com',
+        password='password',
+    )
+
+
+@override_settings(FEED_FANOUT_WORKERS=0)
+class FeedTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.author = create_user('author')
+        self.user = create_user('user')
+        Follow.objects.create(user=self.user, author=self.author)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def publish(self, author, count):
+        # Одинаковые даты у части рецептов проверяют порядок по id
+        pub_date = timezone.now()
+        recipes = []
+        for number in range(count):
+            with self.captureOnCommitCallbacks(execute=True):
+                recipe = Recipe.objects.create(
+                    author=author, name=f'рецепт {number}', text='текст',
+                    cooking_time=5,
+                )
+            Recipe.objects.filter(pk=recipe.pk).update(
+                pub_date=pub_date - timedelta(minutes=number // 2)
+            )
+            FeedItem.objects.filter(recipe=recipe).update(
+                pub_date=pub_date - timedelta(minutes=number // 2)
+            )
+            recipes.append(recipe.pk)
+        return recipes
+
+    def read_feed(self):
+        ids = []
+        url = '/api/recipes/feed/?limit=2'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn('count', response.data)
+            ids += [recipe['id'] for recipe in response.data['results']]
+            url = response.data['next']
+        return ids
+
+    def test_fan_out_after_commit(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            recipe = Recipe.objects.create(
+                author=self.author, name='рецепт', text='текст',
+                cooking_time=5,
+            )
+        self.assertFalse(FeedItem.objects.exists())
+        for callback in callbacks:
+            callback()
+        self.assertEqual(
+            list(FeedItem.objects.values_list('user_id', 'recipe_id')),
+            [(self.user.pk, recipe.pk)],
+        )
+
+    def test_fan_out_in_batches(self):
+        followers = [create_user(f'follower{number}') for number in range(5)]
+        Follow.objects.bulk_create(
+            Follow(user=follower, author=self.author)
+            for follower in followers
+        )
+        with mock.patch('recipes.feed.BATCH_SIZE', 2):
+            recipe_ids = self.publish(self.author, 1)
+        self.assertEqual(
+            FeedItem.objects.filter(recipe_id__in=recipe_ids).count(), 6
+        )
+
+    def test_cursor_pages_follow_feed_order(self):
+        recipe_ids = self.publish(self.author, 5)
+        self.publish(create_user('other'), 2)
+        first, second, third, fourth, fifth = recipe_ids
+        self.assertEqual(
+            self.read_feed(), [second, first, fourth, third, fifth]
+        )
+
+    def test_popular_authors_are_merged_on_read(self):
+        recipe_ids = self.publish(self.author, 3)
+        popular = create_user('popular')
+        Follow.objects.create(user=self.user, author=popular)
+        with override_settings(FEED_FANOUT_LIMIT=0):
+            popular_ids = self.publish(popular, 2)
+            self.assertEqual(
+                FeedItem.objects.filter(recipe_id__in=popular_ids).count(), 0
+            )
+            self.assertCountEqual(self.read_feed(), recipe_ids + popular_ids)
@@ -0,0 +1,90 @@
+import re
+
+from django.core.cache import cache
+from django.http import QueryDict
+from django.test import TestCase
+
+from api.filters import SpecialRecipeFilter, get_tag_ids
+from recipes.models import Recipe, Tag
+from users.models import User
+
+
+def filter_recipes(query):
+    return SpecialRecipeFilter(
+        QueryDict(query), queryset=Recipe.objects.order_by('pk')
+    ).qs
+
+
+def query_shape(queryset):
+    # Число параметров в IN (...) зависит от числа тегов, форма - нет
+    sql, _ = queryset.query.sql_with_params()
+    return re.sub(r'%s(, %s)*', '%s', sql)
+
+
+class TagsFilterTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        author = User.objects.create_user(
+            username='author', email='author@example.com', password='password'
+        )
+        self.tags = {
+            slug: Tag.objects.create(name=slug, color='#fff', slug=slug)
+            for slug in ('a', 'b', 'c')
+        }
+        self.recipes = {}
+        for name, slugs in (('ab', 'ab'), ('a', 'a'), ('bc', 'bc'), ('', '')):
+            recipe = Recipe.objects.create(
+                author=author, name=name or 'без тегов', text='текст',
+                cooking_time=5,
+            )
+            recipe.tags.set([self.tags[slug] for slug in slugs])
+            self.recipes[name] = recipe
+
+    def names(self, query):
+        return [recipe.name for recipe in filter_recipes(query)]
+
+    def test_any_mode_has_no_duplicates(self):
+        self.assertEqual(self.names('tags=a&tags=b'), ['ab', 'a', 'bc'])
+        self.assertEqual(
+            self.names('tags=a&tags=b&tags=c&tags_mode=any'),
+            ['ab', 'a', 'bc'],
+        )
+
+    def test_all_mode_requires_every_tag(self):
+        self.assertEqual(self.names('tags=a&tags=b&tags_mode=all'), ['ab'])
+        self.assertEqual(self.names('tags=b&tags=c&tags_mode=all'), ['bc'])
+        self.assertEqual(
+            self.names('tags=a&tags=b&tags=c&tags_mode=all'), []
+        )
+
+    def test_query_shape_does_not_depend_on_tag_count(self):
+        for mode in ('any', 'all'):
+            with self.subTest(mode=mode):
+                one = filter_recipes(f'tags=a&tags_mode={mode}')
+                three = filter_recipes(
+                    f'tags=a&tags=b&tags=c&tags_mode={mode}'
+                )
+                self.assertEqual(query_shape(one), query_shape(three))
+                self.assertEqual(query_shape(three).count('JOIN'), 0)
+                with self.assertNumQueries(1):
+                    list(three)
+
+    def test_list_count_matches_results(self):
+        response = self.client.get('/api/recipes/?tags=a&tags=b&limit=10')
+        self.assertEqual(response.data['count'], 3)
+        ids = [recipe['id'] for recipe in response.data['results']]
+        self.assertEqual(len(ids), len(set(ids)))
+
+    def test_unknown_slug_is_rejected(self):
+        response = self.client.get('/api/recipes/?tags=a&tags=x')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('tags', response.data)
+
+    def test_slug_map_follows_tag_changes(self):
+        get_tag_ids(['a'])
+        with self.assertNumQueries(0):
+            self.assertEqual(get_tag_ids(['a']), {self.tags['a'].pk})
+        with self.captureOnCommitCallbacks(execute=True):
+            Tag.objects.create(name='d', color='#000', slug='d')
+        self.assertEqual(len(get_tag_ids(['a', 'd'])), 2)
@@ -0,0 +1,45 @@
+import re
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.test import AsyncClient, TestCase, override_settings
+
+from recipes.models import Ingredient, Tag
+from users.models import User
+
+QUERIES = re.compile(r'desc="(\d+) queries"')
+
+
+def count_queries(response):
+    return int(QUERIES.search(response['Server-Timing']).group(1))
+
+
+class PerformanceMiddlewareTests(TestCase):
+    URLS = ('/api/users/', '/api/ingredients/{}/', '/api/tags/')
+
+    def setUp(self):
+        cache.clear()
+        User.objects.create_user(
+            username='user', email='user@example.com', password='password'
+        )
+        self.ingredient = Ingredient.objects.create(
+            name='соль', measurement_unit='г'
+        )
+        Tag.objects.create(name='завтрак', color='#fff', slug='b')
+
+    async def get_wsgi(self, url):
+        return await sync_to_async(self.client.get)(url)
+
+    async def get_asgi(self, url):
+        with override_settings(ROOT_URLCONF='foodgram.asgi_urls'):
+            return await AsyncClient().get(url)
+
+    async def test_asgi_counts_queries_of_sync_views(self):
+        for url in self.URLS:
+            url = url.format(self.ingredient.pk)
+            with self.subTest(url=url):
+                wsgi = await self.get_wsgi(url)
+                asgi = await self.get_asgi(url)
+                self.assertEqual(asgi.status_code, 200)
+                self.assertGreater(count_queries(wsgi), 0)
+                self.assertEqual(count_queries(asgi), count_queries(wsgi))
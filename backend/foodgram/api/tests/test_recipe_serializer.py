@@ -0,0 +1,82 @@
+from django.test import TestCase
+from rest_framework.test import APIRequestFactory
+
+from api.serializers import RecipeSerializer
+from recipes.models import Ingredient, Recipe, Tag
+from users.models import User
+
+
+class RecipeIngredientsTests(TestCase):
+    # Число запросов не зависит от числа ингредиентов: savepoint, запись
+    # рецепта, счётчик автора, одна вставка ингредиентов, теги (три
+    # запроса), release
+    CREATE_QUERIES = 8
+
+    def setUp(self):
+        self.author = User.objects.create_user(
+            username='author', email='author@example.com', password='password'
+        )
+        self.ingredients = Ingredient.objects.bulk_create(
+            Ingredient(name=f'ингредиент {number}', measurement_unit='г')
+            for number in range(10)
+        )
+        self.tag = Tag.objects.create(name='завтрак', color='#fff', slug='b')
+        request = APIRequestFactory().post('/api/recipes/')
+        request.user = self.author
+        self.serializer = RecipeSerializer(context={'request': request})
+
+    def create_recipe(self, amounts):
+        return self.serializer.create({
+            'name': 'рецепт',
+            'text': 'текст',
+            'cooking_time': 5,
+            'tags': [self.tag],
+            'ingredient_for_recipe': self.make_ingredients(amounts),
+        })
+
+    def make_ingredients(self, amounts):
+        return [
+            {'ingredient': {'id': self.ingredients[number].pk},
+             'amount': amount}
+            for number, amount in amounts.items()
+        ]
+
+    def update_recipe(self, recipe, amounts):
+        return self.serializer.update(
+            recipe, {'ingredient_for_recipe': self.make_ingredients(amounts)}
+        )
+
+    def get_amounts(self, recipe):
+        ids = {ingredient.pk: number
+               for number, ingredient in enumerate(self.ingredients)}
+        rows = recipe.ingredient_for_recipe.values_list(
+            'ingredient_id', 'amount'
+        )
+        return {ids[ingredient_id]: amount for ingredient_id, amount in rows}
+
+    def test_create_writes_ingredients_in_one_query(self):
+        for count in (1, 10):
+            with self.subTest(count=count):
+                amounts = {number: number + 1 for number in range(count)}
+                with self.assertNumQueries(self.CREATE_QUERIES):
+                    recipe = self.create_recipe(amounts)
+                self.assertEqual(self.get_amounts(recipe), amounts)
+
+    def test_update_changes_only_the_difference(self):
+        recipe = Recipe.objects.get(
+            pk=self.create_recipe({0: 1, 1: 1, 2: 1, 3: 1, 4: 1}).pk
+        )
+        # 0 и 1 меняются, 2 остаётся, 3 и 4 удаляются, 5-8 добавляются
+        amounts = {0: 2, 1: 3, 2: 1, 5: 1, 6: 1, 7: 1, 8: 1}
+        # savepoint, запись рецепта, корзины рецепта (сигнал), текущие
+        # ингредиенты, удаление, обновление, вставка, release
+        with self.assertNumQueries(8):
+            self.update_recipe(recipe, amounts)
+        self.assertEqual(self.get_amounts(recipe), amounts)
+
+    def test_update_without_ingredient_changes_writes_nothing(self):
+        amounts = {0: 1, 1: 2}
+        recipe = Recipe.objects.get(pk=self.create_recipe(amounts).pk)
+        with self.assertNumQueries(5):
+            self.update_recipe(recipe, amounts)
+        self.assertEqual(self.get_amounts(recipe), amounts)
@@ -0,0 +1,107 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from api.renderers import ShoppingCartRenderer
+from api.shopping_cart import get_shopping_cart
+from recipes.management.commands.load_ingredients import read_csv
+from recipes.models import Cart, Ingredient, IngredientForRecipe, Recipe
+from recipes.units import UNIT_CONVERSIONS
+from users.models import User
+
+
+class DownloadShoppingCartTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='user', email='user@example.com', password='password'
+        )
+        ingredients = Ingredient.objects.bulk_create(
+            Ingredient(name=f'ингредиент {number}', measurement_unit='г')
+            for number in range(60)
+        )
+        recipe = Recipe.objects.create(
+            author=self.user, name='рецепт', text='текст', cooking_time=5
+        )
+        IngredientForRecipe.objects.bulk_create(
+            IngredientForRecipe(recipe=recipe, ingredient=ingredient, amount=2)
+            for ingredient in ingredients
+        )
+        Cart.objects.create(user=self.user, recipe=recipe)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def download(self, format):
+        response = self.client.get(
+            f'/api/recipes/download_shopping_cart/?format={format}'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertIn(
+            f'shopping_list.{format}', response['Content-Disposition']
+        )
+        return b''.join(response.streaming_content)
+
+    def test_text_and_csv(self):
+        text = self.download('txt').decode()
+        self.assertIn('ингредиент 59 (г) — 2', text)
+        rows = self.download('csv').decode().splitlines()
+        self.assertEqual(len(rows), 61)
+        self.assertIn('ингредиент 59,г,2', rows)
+
+    def test_pdf_is_a_complete_document(self):
+        content = self.download('pdf')
+        self.assertTrue(content.startswith(b'%PDF'))
+        self.assertTrue(content.rstrip().endswith(b'%%EOF'))
+        self.assertIn(b'/Count 2', content)
+
+    def test_renderer_must_implement_stream(self):
+        with self.assertRaises(TypeError):
+            ShoppingCartRenderer()
+
+
+class ShoppingCartUnitsTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='user', email='user@example.com', password='password'
+        )
+        self.recipe = Recipe.objects.create(
+            author=self.user, name='рецепт', text='текст', cooking_time=5
+        )
+
+    def add(self, name, unit, amount):
+        ingredient = Ingredient.objects.create(
+            name=name, measurement_unit=unit
+        )
+        IngredientForRecipe.objects.create(
+            recipe=self.recipe, ingredient=ingredient, amount=amount
+        )
+
+    def test_units_fold_into_base_unit(self):
+        self.add('мука', 'г', 300)
+        self.add('мука', 'кг', 2)
+        self.add('молоко', 'мл', 250)
+        self.add('молоко', 'л', 1)
+        self.add('яйца', 'шт.', 3)
+        Cart.objects.create(user=self.user, recipe=self.recipe, servings=2)
+        self.assertEqual(
+            get_shopping_cart(self.user),
+            [
+                ('молоко', 'мл', 2500),
+                ('мука', 'г', 4600),
+                ('яйца', 'шт.', 6),
+            ],
+        )
+
+    def test_conversions_use_catalog_units(self):
+        path = settings.INGREDIENTS_DATA_DIR / 'ingredients.csv'
+        with open(path, encoding='utf-8', newline='') as file:
+            units = {unit for _, _, unit in read_csv(file)}
+        for unit, (base, _) in UNIT_CONVERSIONS.items():
+            with self.subTest(unit=unit):
+                self.assertIn(unit, units)
+                self.assertIn(base, units)
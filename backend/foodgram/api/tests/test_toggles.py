@@ -0,0 +1,91 @@
+import threading
+
+from django.db import connection, connections
+from django.test import TransactionTestCase
+from rest_framework.test import APIClient
+
+from recipes.models import Favorite, Recipe
+from users.models import Follow, User
+
+THREADS = 4
+
+
+class ConcurrentToggleTests(TransactionTestCase):
+    """Одновременные запросы на одну и ту же пару пользователь-объект
+    оставляют одну строку и сходящийся с ней счётчик.
+    """
+
+    def setUp(self):
+        if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+            self.skipTest('SQLite в памяти не работает с потоками, '
+                          'нужен DB_TEST_NAME')
+        self.user = User.objects.create_user(
+            username='user', email='user@example.com', password='password'
+        )
+        self.author = User.objects.create_user(
+            username='author', email='author@example.com',
+            password='password',
+        )
+        self.recipe = Recipe.objects.create(
+            author=self.author, name='рецепт', text='текст', cooking_time=5
+        )
+
+    def race(self, method, url):
+        barrier = threading.Barrier(THREADS)
+        statuses = []
+
+        def request():
+            client = APIClient()
+            client.force_authenticate(self.user)
+            barrier.wait()
+            try:
+                statuses.append(getattr(client, method)(url).status_code)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=request) for _ in range(THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return sorted(statuses)
+
+    def test_favorite_added_once(self):
+        statuses = self.race(
+            'post', f'/api/recipes/{self.recipe.pk}/favorite/'
+        )
+        self.assertEqual(statuses, [201] + [400] * (THREADS - 1))
+        self.assertEqual(Favorite.objects.filter(user=self.user).count(), 1)
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.favorites_count, 1)
+
+    def test_subscription_created_once(self):
+        statuses = self.race(
+            'post', f'/api/users/{self.author.pk}/subscribe/'
+        )
+        self.assertEqual(statuses, [201] + [400] * (THREADS - 1))
+        self.assertEqual(Follow.objects.filter(user=self.user).count(), 1)
+        self.author.refresh_from_db()
+        self.assertEqual(self.author.followers_count, 1)
+
+    def test_favorite_removed_once(self):
+        url = f'/api/recipes/{self.recipe.pk}/favorite/'
+        client = APIClient()
+        client.force_authenticate(self.user)
+        client.post(url)
+        statuses = self.race('delete', url)
+        self.assertEqual(statuses, [204] + [400] * (THREADS - 1))
+        self.assertFalse(Favorite.objects.filter(user=self.user).exists())
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.favorites_count, 0)
+
+    def test_subscription_removed_once(self):
+        url = f'/api/users/{self.author.pk}/subscribe/'
+        client = APIClient()
+        client.force_authenticate(self.user)
+        client.post(url)
+        statuses = self.race('delete', url)
+        self.assertEqual(statuses, [204] + [400] * (THREADS - 1))
+        self.assertFalse(Follow.objects.filter(user=self.user).exists())
+        self.author.refresh_from_db()
+        self.assertEqual(self.author.followers_count, 0)
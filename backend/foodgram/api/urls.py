@@ -2,7 +2,8 @@ from django.urls import include, path
 from django.views.generic import TemplateView
 from rest_framework.routers import DefaultRouter
 
-from api.views import IngredientViewSet, RecipeViewSet, TagViewSet, UserViewSet
+from api.views import (IngredientViewSet, PerformanceStatsView, RecipeViewSet,
+                       TagViewSet, UserViewSet)
 
 v1_router = DefaultRouter()
 v1_router.register(r'users', UserViewSet, basename='api_users')
@@ -15,6 +16,11 @@ v1_router.register(r'recipes', RecipeViewSet, basename='api_recipes')
 urlpatterns = [
     path('', include(v1_router.urls)),
     path('auth/', include('djoser.urls.authtoken')),
+    path(
+        'performance/',
+        PerformanceStatsView.as_view(),
+        name='performance_stats'
+    ),
     path(
         'docs/',
         TemplateView.as_view(template_name='redoc.html'),
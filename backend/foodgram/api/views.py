@@ -1,31 +1,87 @@
-from django.db.models import Sum
-from django.http.response import HttpResponse
+from django.db.models import Exists, OuterRef, Prefetch, Subquery
+from django.http import Http404
+from django.http.response import StreamingHttpResponse
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import status, viewsets
 from rest_framework.decorators import action
 from rest_framework.generics import get_object_or_404
-from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.views import APIView
 
-from recipes.models import (Cart, Favorite, Ingredient, IngredientForRecipe,
-                            Recipe, Tag)
+from recipes.bulk import (add_recipes, move_favorites_to_cart,
+                          recipes_bulk_changed, remove_recipes)
+from recipes.feed import get_feed
+from recipes.models import Cart, Favorite, Ingredient, Recipe, Tag
+from recipes.search import ingredient_index
 from users.models import Follow, User
+from users.utils import create_link, delete_link
+from api.conditional import CatalogConditionalMixin, versioned_response
 from api.filters import SpecialIngredientFilter, SpecialRecipeFilter
-from api.pagination import CustomPageNumberPagination
+from api.middleware import endpoint_stats
+from api.pagination import (FeedCursorPagination, RecipePagination,
+                            UserPagination)
 from api.permissions import SafeOrAuthenticatedAndAuthorPermission
-from api.serializers import (CustomUserSerializer, FollowSerializer,
-                             IngredientSerializer, NewPasswordSerializer,
-                             RecipeCartSerializer, RecipeFollowSerializer,
-                             RecipeSerializer, TagSerializer)
+from api.renderers import (CSVShoppingCartRenderer, PDFShoppingCartRenderer,
+                           TextShoppingCartRenderer)
+from api.response_cache import (get_detail_version_keys,
+                                get_list_version_keys, make_detail_key,
+                                make_list_key)
+from api.serializers import (CartServingsSerializer, CustomUserSerializer,
+                             FollowSerializer,
+                             IngredientSerializer, MoveFavoritesSerializer,
+                             NewPasswordSerializer, RecipeCartSerializer,
+                             RecipeFollowSerializer, RecipeIdsSerializer,
+                             RecipeSerializer, TagSerializer,
+                             get_recipe_prefetches, get_recipes_limit)
+from api.shopping_cart import get_shopping_cart
+
+
+def get_recipes_preview(recipes_limit):
+    return Recipe.objects.filter(
+        pk__in=Subquery(
+            Recipe.objects.filter(
+                author=OuterRef('author')
+            ).values('pk')[:recipes_limit]
+        )
+    )
+
+
+def get_target_id(pk):
+    try:
+        return int(pk)
+    except ValueError:
+        raise Http404
+
+
+def get_batch_results(recipe_ids, results):
+    return {
+        'results': [
+            {'id': recipe_id, 'status': results[recipe_id]}
+            for recipe_id in recipe_ids
+        ]
+    }
 
 
 class UserViewSet(viewsets.ModelViewSet):
     queryset = User.objects.all()
     serializer_class = CustomUserSerializer
-    pagination_class = CustomPageNumberPagination
+    pagination_class = UserPagination
     http_method_names = ['get', 'post', 'delete']
     permission_classes = [AllowAny]
 
+    def get_subscriptions(self):
+        recipes_limit = get_recipes_limit(self.request)
+        return Follow.objects.filter(
+            user=self.request.user
+        ).select_related('author').prefetch_related(
+            Prefetch(
+                'author__recipes',
+                queryset=get_recipes_preview(recipes_limit),
+                to_attr='recipes_preview',
+            )
+        )
+
     @action(
         detail=False,
         methods=['get'],
@@ -44,7 +100,6 @@ class UserViewSet(viewsets.ModelViewSet):
         serializer = NewPasswordSerializer(data=request.data)
         user = request.user
         if serializer.is_valid():
-            print(request.data)
             if not user.check_password(request.data.get('current_password')):
                 return Response(
                     {'current_password': ['Неправильный пароль.']},
@@ -61,8 +116,7 @@ class UserViewSet(viewsets.ModelViewSet):
         permission_classes=[IsAuthenticated],
     )
     def subscriptions(self, request):
-        user = request.user
-        subscriptions = Follow.objects.filter(user=user)
+        subscriptions = self.get_subscriptions()
         pages = self.paginate_queryset(subscriptions)
         serializer = FollowSerializer(
             pages, many=True, context={"request": request}
@@ -76,10 +130,13 @@ class UserViewSet(viewsets.ModelViewSet):
     )
     def subscribe(self, request, pk):
         user = request.user
-        author = get_object_or_404(User, id=pk)
-        subscription = user.follower.filter(author=author)
+        author_id = get_target_id(pk)
         if request.method == 'POST':
-            if subscription.exists() or author == user:
+            author = get_object_or_404(User, id=author_id)
+            subscription = None
+            if author != user:
+                subscription = create_link(Follow, user=user, author=author)
+            if subscription is None:
                 return Response(
                     {
                         'errors': (
@@ -89,22 +146,19 @@ class UserViewSet(viewsets.ModelViewSet):
                     },
                     status=status.HTTP_400_BAD_REQUEST
                 )
-            new_subscription = Follow.objects.create(
-                user=user, author=author
-            )
-            serializer = FollowSerializer(new_subscription)
+            serializer = FollowSerializer(subscription)
             return Response(
                 serializer.data,
                 status=status.HTTP_201_CREATED
             )
-        if subscription.exists():
-            subscription.delete()
+        if delete_link(Follow, user=user, author_id=author_id):
             return Response(
                 {
                     'success': 'Вы успешно отписались от этого пользователя'
                 },
                 status=status.HTTP_204_NO_CONTENT
             )
+        get_object_or_404(User, id=author_id)
         return Response(
                     {
                         'errors': 'Вы не подписаны на этого пользователя'
@@ -113,18 +167,32 @@ class UserViewSet(viewsets.ModelViewSet):
                 )
 
 
-class TagViewSet(viewsets.ReadOnlyModelViewSet):
+class TagViewSet(CatalogConditionalMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
 
 
-class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
+class IngredientViewSet(CatalogConditionalMixin,
+                        viewsets.ReadOnlyModelViewSet):
     queryset = Ingredient.objects.all()
     serializer_class = IngredientSerializer
     filter_backends = [DjangoFilterBackend]
     filterset_class = SpecialIngredientFilter
     filterset_fields = ('name', )
 
+    def list(self, request, *args, **kwargs):
+        name = request.query_params.get('name')
+        if name is None:
+            return super().list(request, *args, **kwargs)
+        return self.catalog_response(
+            request,
+            lambda: Response(
+                self.get_serializer(
+                    ingredient_index.search(name), many=True
+                ).data
+            ),
+        )
+
 
 class RecipeViewSet(viewsets.ModelViewSet):
     queryset = Recipe.objects.all()
@@ -132,45 +200,99 @@ class RecipeViewSet(viewsets.ModelViewSet):
     http_method_names = ['get', 'post', 'patch', 'delete']
     filter_backends = (DjangoFilterBackend,)
     filterset_class = SpecialRecipeFilter
-    pagination_class = CustomPageNumberPagination
+    pagination_class = RecipePagination
     permission_classes = (SafeOrAuthenticatedAndAuthorPermission, )
 
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if self.action in ('list', 'feed'):
+            context['image_variant'] = 'card'
+        elif self.action == 'retrieve':
+            context['image_variant'] = 'detail'
+        return context
+
+    def get_queryset(self):
+        return self.annotate_user_state(
+            Recipe.objects.select_related('author').prefetch_related(
+                *get_recipe_prefetches()
+            )
+        )
+
+    def annotate_user_state(self, queryset):
+        user = self.request.user
+        if user.is_authenticated:
+            queryset = queryset.annotate(
+                is_favorited=Exists(
+                    Favorite.objects.filter(user=user, recipe=OuterRef('pk'))
+                ),
+                is_in_shopping_cart=Exists(
+                    Cart.objects.filter(user=user, recipe=OuterRef('pk'))
+                ),
+                author_is_subscribed=Exists(
+                    Follow.objects.filter(
+                        user=user, author=OuterRef('author')
+                    )
+                ),
+            )
+        return queryset
+
+    def list(self, request, *args, **kwargs):
+        return versioned_response(
+            request,
+            get_list_version_keys(request.user),
+            make_list_key,
+            lambda: super(RecipeViewSet, self).list(request, *args, **kwargs),
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        recipe_id = get_target_id(kwargs['pk'])
+        return versioned_response(
+            request,
+            get_detail_version_keys(recipe_id, request.user),
+            make_detail_key,
+            lambda: super(RecipeViewSet, self).retrieve(
+                request, *args, **kwargs
+            ),
+        )
+
     @action(
-        detail=True,
-        methods=['post', 'delete'],
+        detail=False,
+        methods=['get'],
         permission_classes=[IsAuthenticated],
+        pagination_class=FeedCursorPagination,
     )
-    def favorite(self, request, pk):
-        recipe = get_object_or_404(Recipe, id=pk)
-        favorite = self.request.user.favorite.filter(recipe=recipe)
+    def feed(self, request):
+        queryset = get_feed(self.get_queryset(), request.user)
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    def toggle_recipe(self, request, pk, model, serializer_class, errors,
+                      success, **values):
+        """Добавляет рецепт в избранное или корзину (model) или убирает
+        его оттуда, без проверки наличия связи заранее.
+        """
+        user = request.user
+        recipe_id = get_target_id(pk)
         if request.method == 'POST':
-            if favorite.exists():
+            recipe = get_object_or_404(Recipe, id=recipe_id)
+            if create_link(model, user=user, recipe=recipe, **values) is None:
                 return Response(
-                    {
-                        'errors': 'Этот рецепт уже у Вас в избранном'
-                    },
+                    {'errors': errors[0]},
                     status=status.HTTP_400_BAD_REQUEST
                 )
-            favorite = Favorite.objects.create(
-                user=self.request.user, recipe=recipe
-            )
-            favorite.save()
-            serializer = RecipeFollowSerializer(recipe)
+            serializer = serializer_class(recipe)
             return Response(
                 serializer.data, status=status.HTTP_201_CREATED
             )
-        if not favorite.exists():
+        if not delete_link(model, user=user, recipe_id=recipe_id):
+            get_object_or_404(Recipe, id=recipe_id)
             return Response(
-                {
-                    'errors': 'Этого рецепта нет у Вас в избранном'
-                },
+                {'errors': errors[1]},
                 status=status.HTTP_400_BAD_REQUEST,
             )
-        favorite.delete()
         return Response(
-            {
-                'success': 'Рецепт успешно удалён из избранного'
-            },
+            {'success': success},
             status=status.HTTP_204_NO_CONTENT
         )
 
@@ -179,60 +301,139 @@ class RecipeViewSet(viewsets.ModelViewSet):
         methods=['post', 'delete'],
         permission_classes=[IsAuthenticated],
     )
+    def favorite(self, request, pk):
+        return self.toggle_recipe(
+            request,
+            pk,
+            Favorite,
+            RecipeFollowSerializer,
+            errors=(
+                'Этот рецепт уже у Вас в избранном',
+                'Этого рецепта нет у Вас в избранном',
+            ),
+            success='Рецепт успешно удалён из избранного',
+        )
+
+    @action(
+        detail=True,
+        methods=['post', 'patch', 'delete'],
+        permission_classes=[IsAuthenticated],
+    )
     def shopping_cart(self, request, pk):
-        recipe = get_object_or_404(Recipe, id=pk)
-        cart = self.request.user.cart.filter(recipe=recipe)
-        if request.method == 'POST':
-            if cart.exists():
-                return Response(
-                    {
-                        'errors': 'Этот рецепт уже в вашей корзине'
-                    },
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-            cart = Cart.objects.create(
-                user=self.request.user, recipe=recipe
+        messages = {
+            'errors': (
+                'Этот рецепт уже в вашей корзине',
+                'Этого рецепта нет у Вас в корзине',
+            ),
+            'success': 'Рецепт успешно удалён из корзины',
+        }
+        if request.method == 'DELETE':
+            return self.toggle_recipe(
+                request, pk, Cart, RecipeCartSerializer, **messages
             )
-            cart.save()
-            serializer = RecipeCartSerializer(recipe)
-            return Response(
-                serializer.data, status=status.HTTP_201_CREATED
+        serializer = CartServingsSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        if request.method == 'POST':
+            return self.toggle_recipe(
+                request,
+                pk,
+                Cart,
+                RecipeCartSerializer,
+                **messages,
+                **serializer.validated_data,
             )
-        if not cart.exists():
+        recipe_id = get_target_id(pk)
+        if not Cart.objects.filter(
+            user=request.user, recipe_id=recipe_id
+        ).update(**serializer.validated_data):
+            get_object_or_404(Recipe, id=recipe_id)
             return Response(
-                {
-                    'errors': 'Этого рецепта нет у Вас в корзине'
-                },
+                {'errors': messages['errors'][1]},
                 status=status.HTTP_400_BAD_REQUEST,
             )
-        cart.delete()
-        return Response(
-            {
-                'success': 'Рецепт успешно удалён из корзины'
-            },
-            status=status.HTTP_204_NO_CONTENT
+        recipes_bulk_changed.send(
+            sender=Cart, user_id=request.user.pk, recipe_ids=[recipe_id]
+        )
+        return Response(serializer.data)
+
+    def change_recipes(self, request, model):
+        serializer = RecipeIdsSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        recipe_ids = serializer.validated_data['recipes']
+        if request.method == 'POST':
+            results = add_recipes(model, request.user, recipe_ids)
+        else:
+            results = remove_recipes(model, request.user, recipe_ids)
+        return Response(get_batch_results(recipe_ids, results))
+
+    @action(
+        detail=False,
+        methods=['post', 'delete'],
+        permission_classes=[IsAuthenticated],
+        url_path='favorite',
+        url_name='favorite-batch',
+    )
+    def favorite_batch(self, request):
+        return self.change_recipes(request, Favorite)
+
+    @action(
+        detail=False,
+        methods=['post', 'delete'],
+        permission_classes=[IsAuthenticated],
+        url_path='shopping_cart',
+        url_name='shopping-cart-batch',
+    )
+    def shopping_cart_batch(self, request):
+        return self.change_recipes(request, Cart)
+
+    @action(
+        detail=False,
+        methods=['post'],
+        permission_classes=[IsAuthenticated],
+        url_path='favorite/to_shopping_cart',
+    )
+    def favorite_to_shopping_cart(self, request):
+        serializer = MoveFavoritesSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        recipe_ids = serializer.validated_data.get('recipes')
+        results = move_favorites_to_cart(
+            request.user,
+            recipe_ids,
+            serializer.validated_data['remove_from_favorite'],
         )
+        return Response(get_batch_results(recipe_ids or results, results))
 
     @action(
         detail=False,
         methods=['get'],
         permission_classes=[IsAuthenticated],
+        renderer_classes=[
+            TextShoppingCartRenderer,
+            CSVShoppingCartRenderer,
+            PDFShoppingCartRenderer,
+        ],
     )
     def download_shopping_cart(self, request):
-        text = 'Список ингредиентов для ваших рецептов:\n\n'
-        ingredients = IngredientForRecipe.objects.filter(
-            recipe__cart__user=request.user
-        ).values('ingredient__name', 'ingredient__measurement_unit').annotate(
-            amount=Sum("amount")
+        renderer = request.accepted_renderer
+        content_type = renderer.media_type
+        if renderer.charset:
+            content_type = f'{content_type}; charset={renderer.charset}'
+        response = StreamingHttpResponse(
+            renderer.stream(get_shopping_cart(request.user)),
+            content_type=content_type,
         )
-
-        text += '\n'.join([
-            f'{ingredient["ingredient__name"]} '
-            f'({ingredient["ingredient__measurement_unit"]}) — '
-            f'{ingredient["amount"]}\n' for ingredient in ingredients
-        ])
-        response = HttpResponse(text, content_type='text/plain')
         response['Content-Disposition'] = (
-            'attachment; filename="shopping_list.txt"'
+            f'attachment; filename="shopping_list.{renderer.format}"'
         )
         return response
+
+
+class PerformanceStatsView(APIView):
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(endpoint_stats.snapshot())
+
+    def delete(self, request):
+        endpoint_stats.reset()
+        return Response(status=status.HTTP_204_NO_CONTENT)
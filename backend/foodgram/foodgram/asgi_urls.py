@@ -0,0 +1,13 @@
+from django.urls import include, path
+
+from api.middleware import track_sync_views
+from foodgram import urls
+
+# При запуске через ASGI список и карточку рецептов и поиск ингредиентов
+# обслуживают async-вьюхи из api.async_views, остальное остаётся
+# как в foodgram.urls, а запросы синхронных вьюх считает
+# PerformanceMiddleware
+urlpatterns = track_sync_views([
+    path('api/', include('api.async_urls')),
+    *urls.urlpatterns,
+])
@@ -0,0 +1,82 @@
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+
+_deferred = ContextVar('deferred_counters', default=None)
+
+
+class DeferredCounters:
+
+    def __init__(self, origin):
+        self.origin = origin
+        self.changes = defaultdict(Counter)
+
+    def flush(self):
+        for (model, field), deltas in self.changes.items():
+            pks_by_delta = defaultdict(list)
+            for pk, delta in deltas.items():
+                if delta:
+                    pks_by_delta[delta].append(pk)
+            for delta, pks in pks_by_delta.items():
+                shift_counter(model.objects.filter(pk__in=pks), field, delta)
+        self.changes.clear()
+
+
+def shift_counter(queryset, field, delta):
+    value = F(field) + delta
+    if delta < 0:
+        value = Greatest(value, 0)
+    return queryset.update(**{field: value})
+
+
+def increment_counter(queryset, field):
+    return shift_counter(queryset, field, 1)
+
+
+def decrement_counter(queryset, field):
+    return shift_counter(queryset, field, -1)
+
+
+def change_counter(model, pk, field, delta):
+    """Сдвигает счётчик field объекта model с первичным ключом pk.
+
+    Внутри deferred_counters сдвиги копятся и применяются в конце блока.
+    """
+    deferred = _deferred.get()
+    if deferred is not None:
+        deferred.changes[model, field][pk] += delta
+        return
+    shift_counter(model.objects.filter(pk=pk), field, delta)
+
+
+@contextmanager
+def deferred_counters(origin=None):
+    """Откладывает изменения счётчиков до конца блока.
+
+    Удаление рецепта или пользователя каскадом удаляет подписки,
+    избранное и корзины, и обработчики post_delete каждой строки
+    обновляли бы счётчики по одному. В блоке сдвиги суммируются
+    и применяются одним UPDATE на счётчик и величину сдвига, в той же
+    транзакции. origin - модель, удаление которой идёт в блоке.
+    """
+    if _deferred.get() is not None:
+        yield _deferred.get()
+        return
+    deferred = DeferredCounters(origin)
+    token = _deferred.set(deferred)
+    try:
+        with transaction.atomic():
+            yield deferred
+            deferred.flush()
+    finally:
+        _deferred.reset(token)
+
+
+def is_deleting(model):
+    """Идёт ли в текущем блоке deferred_counters удаление model."""
+    deferred = _deferred.get()
+    return deferred is not None and deferred.origin is model
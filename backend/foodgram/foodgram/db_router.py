@@ -0,0 +1,110 @@
+import asyncio
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+PIN_COOKIE = 'db_pin'
+
+# Вне запросов (команды, фоновые задачи) всё читается с основной бд
+_use_primary = ContextVar('use_primary', default=True)
+
+
+@contextmanager
+def read_from_primary():
+    """Читать с основной бд внутри блока.
+
+    Нужно там, где прочитанное кладётся в кэш: данные с отставшей реплики
+    остались бы в нём и после сброса версии.
+    """
+    token = _use_primary.set(True)
+    try:
+        yield
+    finally:
+        _use_primary.reset(token)
+
+
+class ReplicaRouter:
+    """Отправляет чтение безопасных запросов на реплики из
+    DATABASE_REPLICAS, а запись и всё остальное на основную бд.
+    """
+
+    def db_for_read(self, model, **hints):
+        replicas = settings.DATABASE_REPLICAS
+        if (
+            not replicas
+            or _use_primary.get()
+            or connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
+
+
+class ReplicaPinningMiddleware:
+    """Включает чтение с реплик для безопасных запросов.
+
+    После изменяющего запроса клиент получает куку, и следующие
+    REPLICA_PIN_SECONDS секунд его запросы читают с основной бд,
+    чтобы сразу видеть свои изменения несмотря на отставание реплик.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = self.route(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            _use_primary.reset(token)
+        return self.pin(request, response)
+
+    async def __acall__(self, request):
+        token = self.route(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _use_primary.reset(token)
+        return self.pin(request, response)
+
+    def route(self, request):
+        return _use_primary.set(
+            request.method not in SAFE_METHODS
+            or PIN_COOKIE in request.COOKIES
+        )
+
+    def pin(self, request, response):
+        if (
+            request.method not in SAFE_METHODS
+            and settings.DATABASE_REPLICAS
+        ):
+            response.set_cookie(
+                PIN_COOKIE,
+                '1',
+                max_age=settings.REPLICA_PIN_SECONDS,
+                httponly=True,
+                samesite='Lax',
+            )
+        return response
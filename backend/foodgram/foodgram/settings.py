@@ -1,7 +1,7 @@
 from pathlib import Path
 from datetime import timedelta
 
-from decouple import config
+from decouple import Csv, config
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -38,6 +38,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.middleware.PerformanceMiddleware',
+    'foodgram.db_router.ReplicaPinningMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -47,7 +49,8 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
-ROOT_URLCONF = 'foodgram.urls'
+# asgi.py подставляет foodgram.asgi_urls с async-вьюхами для чтения
+ROOT_URLCONF = config('ROOT_URLCONF', default='foodgram.urls')
 
 TEMPLATES_DIR = BASE_DIR / 'templates'
 TEMPLATES = [
@@ -79,7 +82,47 @@ DATABASES = {
         'USER': config('POSTGRES_USER', default='postgres'),
         'PASSWORD': config('POSTGRES_PASSWORD', default='postgres'),
         'HOST': config('DB_HOST', default='db'),
-        'PORT': config('DB_PORT', default='5432')
+        'PORT': config('DB_PORT', default='5432'),
+        # Тестам с потоками нужна SQLite в файле, а не в памяти
+        'TEST': {'NAME': config('DB_TEST_NAME', default=None)},
+    }
+}
+
+# Реплики для чтения: список хостов через запятую (для SQLite - путей
+# к файлам). Пишем всегда в default, см. foodgram.db_router
+DATABASE_REPLICAS = []
+for number, replica in enumerate(
+    config('DB_REPLICAS', default='', cast=Csv()), start=1
+):
+    alias = f'replica{number}'
+    option = 'NAME' if DATABASES['default']['ENGINE'].endswith(
+        'sqlite3'
+    ) else 'HOST'
+    DATABASES[alias] = {
+        **DATABASES['default'],
+        option: replica,
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['foodgram.db_router.ReplicaRouter']
+
+# Сколько секунд после изменяющего запроса клиент читает с основной бд
+REPLICA_PIN_SECONDS = config('REPLICA_PIN_SECONDS', default=15, cast=int)
+
+
+# Cache
+# https://docs.djangoproject.com/en/4.0/topics/cache/
+# При нескольких воркерах нужен общий для них бэкенд (файловый, memcached,
+# redis), иначе сброс версий кеша не дойдёт до соседних процессов.
+
+CACHES = {
+    'default': {
+        'BACKEND': config(
+            'CACHE_BACKEND',
+            default='django.core.cache.backends.locmem.LocMemCache',
+        ),
+        'LOCATION': config('CACHE_LOCATION', default='foodgram'),
     }
 }
 
@@ -126,6 +169,17 @@ STATIC_ROOT = BASE_DIR / 'backend_static/'
 MEDIA_URL = '/backend_media/'
 MEDIA_ROOT = BASE_DIR / 'backend_media'
 
+# Recipe images: size limits and background thumbnail workers
+# (0 workers builds thumbnails synchronously after commit)
+
+IMAGE_MAX_BYTES = config('IMAGE_MAX_BYTES', default=5 * 1024 * 1024, cast=int)
+IMAGE_MAX_PIXELS = config('IMAGE_MAX_PIXELS', default=4096 * 4096, cast=int)
+IMAGE_PROCESSING_WORKERS = config(
+    'IMAGE_PROCESSING_WORKERS', default=2, cast=int
+)
+# Base64 inflates images by a third, leave room for the rest of the recipe
+DATA_UPLOAD_MAX_MEMORY_SIZE = IMAGE_MAX_BYTES * 3 // 2
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.0/ref/settings/#default-auto-field
 
@@ -142,12 +196,69 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'api.authentication.CachedTokenAuthentication',
     ],
     'PAGE_SIZE': 6,
 }
 
 
+# In-process cache of authentication tokens, see api.authentication
+
+TOKEN_CACHE_SIZE = config('TOKEN_CACHE_SIZE', default=10000, cast=int)
+TOKEN_CACHE_TTL = config('TOKEN_CACHE_TTL', default=60, cast=int)
+
+
+# Cache of recipe list and detail responses for anonymous users,
+# invalidated by api.signals
+
+RECIPES_CACHE_TIMEOUT = config(
+    'RECIPES_CACHE_TIMEOUT', default=60 * 10, cast=int
+)
+# Слаги тегов для фильтра по тегам, см. api.filters
+TAG_SLUGS_CACHE_TIMEOUT = config(
+    'TAG_SLUGS_CACHE_TIMEOUT', default=60 * 60, cast=int
+)
+
+
+# Feed of recipes from followed authors, see recipes.feed.
+# Recipes of authors with more followers than FEED_FANOUT_LIMIT are not
+# copied into feeds but merged in on read. New recipes are copied into
+# feeds by background workers after commit (0 workers copies synchronously)
+
+FEED_FANOUT_LIMIT = config('FEED_FANOUT_LIMIT', default=10000, cast=int)
+FEED_BACKFILL_SIZE = config('FEED_BACKFILL_SIZE', default=50, cast=int)
+FEED_FANOUT_WORKERS = config('FEED_FANOUT_WORKERS', default=1, cast=int)
+
+
+# Shopping list
+
+SHOPPING_CART_CACHE_TIMEOUT = config(
+    'SHOPPING_CART_CACHE_TIMEOUT', default=60 * 60 * 24, cast=int
+)
+SHOPPING_LIST_PDF_FONT = config(
+    'SHOPPING_LIST_PDF_FONT',
+    default='/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf',
+)
+
+
+# Ingredient catalog files for load_ingredients (data/ in the repository)
+
+INGREDIENTS_DATA_DIR = config(
+    'INGREDIENTS_DATA_DIR', default=BASE_DIR.parent.parent / 'data', cast=Path
+)
+
+
+# Performance budgets, requests above them are logged by
+# api.middleware.PerformanceMiddleware
+
+PERFORMANCE_QUERY_BUDGET = config(
+    'PERFORMANCE_QUERY_BUDGET', default=20, cast=int
+)
+PERFORMANCE_LATENCY_BUDGET_MS = config(
+    'PERFORMANCE_LATENCY_BUDGET_MS', default=500, cast=int
+)
+
+
 DJOSER = {
     'LOGIN_FIELD': 'email',
     'SERIALIZERS': {
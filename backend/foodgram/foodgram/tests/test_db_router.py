@@ -0,0 +1,118 @@
+from unittest import skipUnless
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections, transaction
+from django.test import TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from foodgram.db_router import PIN_COOKIE, _use_primary, read_from_primary
+from recipes.models import Favorite, Recipe, Tag
+from users.models import User
+
+
+@skipUnless(settings.DATABASE_REPLICAS, 'нужна реплика в DB_REPLICAS')
+class ReplicaRouterTests(TransactionTestCase):
+    # В тестах реплика - зеркало основной бд, запросы различаются
+    # по соединению, через которое они прошли. Без реплик в настройках
+    # класс пропускается, но databases проверяется раньше пропуска
+    databases = {'default', *settings.DATABASE_REPLICAS[:1]}
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(
+            username='author', email='author@example.com', password='password'
+        )
+        self.recipe = Recipe.objects.create(
+            author=self.author, name='рецепт', text='текст', cooking_time=5
+        )
+        Tag.objects.create(name='завтрак', color='#fff', slug='b')
+        self.client = APIClient()
+
+    def capture(self, action):
+        replica_connection = connections[settings.DATABASE_REPLICAS[0]]
+        with CaptureQueriesContext(connections['default']) as primary:
+            with CaptureQueriesContext(replica_connection) as replica:
+                result = action()
+        return result, primary.captured_queries, replica.captured_queries
+
+    def read_tags(self):
+        return list(Tag.objects.all())
+
+    def test_reads_outside_requests_go_to_primary(self):
+        _, primary, replica = self.capture(self.read_tags)
+        self.assertTrue(primary)
+        self.assertFalse(replica)
+
+    def test_safe_request_reads_from_replica(self):
+        token = _use_primary.set(False)
+        try:
+            _, primary, replica = self.capture(self.read_tags)
+            self.assertFalse(primary)
+            self.assertTrue(replica)
+            with read_from_primary():
+                _, primary, replica = self.capture(self.read_tags)
+            self.assertTrue(primary)
+            self.assertFalse(replica)
+            with transaction.atomic():
+                _, primary, replica = self.capture(self.read_tags)
+            self.assertTrue(primary)
+            self.assertFalse(replica)
+        finally:
+            _use_primary.reset(token)
+
+    def test_writes_go_to_primary(self):
+        token = _use_primary.set(False)
+        try:
+            _, primary, replica = self.capture(
+                lambda: Tag.objects.create(
+                    name='обед', color='#000', slug='l'
+                )
+            )
+        finally:
+            _use_primary.reset(token)
+        self.assertTrue(primary)
+        self.assertFalse(replica)
+
+    def test_get_reads_from_replica(self):
+        response, primary, replica = self.capture(
+            lambda: self.client.get('/api/tags/')
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(primary)
+        self.assertTrue(replica)
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+
+    def test_cached_responses_are_built_from_primary(self):
+        response, primary, replica = self.capture(
+            lambda: self.client.get('/api/recipes/')
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(primary)
+        self.assertFalse(replica)
+
+    def test_write_pins_client_to_primary(self):
+        user = User.objects.create_user(
+            username='user', email='user@example.com', password='password'
+        )
+        self.client.force_authenticate(user)
+        response, primary, replica = self.capture(
+            lambda: self.client.post(
+                f'/api/recipes/{self.recipe.pk}/favorite/'
+            )
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(Favorite.objects.filter(user=user).exists())
+        self.assertFalse(replica)
+        self.assertTrue(
+            any(query['sql'].startswith('INSERT') for query in primary)
+        )
+        cookie = response.cookies[PIN_COOKIE]
+        self.assertEqual(cookie['max-age'], settings.REPLICA_PIN_SECONDS)
+        response, primary, replica = self.capture(
+            lambda: self.client.get('/api/tags/')
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(primary)
+        self.assertFalse(replica)
@@ -0,0 +1,48 @@
+import time
+from uuid import uuid4
+
+from django.core.cache import cache
+
+
+def new_version():
+    # Время создания в начале версии дает Last-Modified ответов
+    return f'{time.time():.6f}-{uuid4().hex}'
+
+
+def get_version(key):
+    """Версия данных из общего кэша, при её отсутствии создаётся новая.
+
+    Версии входят в ключи кэшей и ETag, сброс версии (bump_versions)
+    делает устаревшими их все сразу во всех процессах.
+    """
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, new_version(), None)
+        version = cache.get(key)
+    return version
+
+
+async def aget_version(key):
+    version = await cache.aget(key)
+    if version is None:
+        await cache.aadd(key, new_version(), None)
+        version = await cache.aget(key)
+    return version
+
+
+def bump_versions(*keys):
+    # Новая версия, а не удаление старой: время в ней - время изменения
+    cache.set_many(dict.fromkeys(keys, new_version()), None)
+
+
+def get_versions_time(*versions):
+    """Время создания самой новой из версий или None, если у какой-то
+    из них времени нет (версии, созданные до его появления).
+    """
+    times = []
+    for version in versions:
+        created, separator, _ = version.partition('-')
+        if not separator:
+            return None
+        times.append(float(created))
+    return max(times, default=None)
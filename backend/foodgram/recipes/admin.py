@@ -1,6 +1,8 @@
 from django.contrib import admin
+from django.db.models import Prefetch
 
-from recipes.models import Cart, Favorite, Ingredient, Recipe, Tag
+from recipes.models import (Cart, Favorite, Ingredient, IngredientForRecipe,
+                            Recipe, Tag)
 
 
 @admin.register(Tag)
@@ -14,7 +16,13 @@ class TagAdmin(admin.ModelAdmin):
 class IngredientAdmin(admin.ModelAdmin):
     list_display = ('pk', 'name', 'measurement_unit')
     search_fields = ('name', )
-    list_filter = ('name', )
+    list_filter = ('measurement_unit', )
+
+
+class IngredientForRecipeInline(admin.TabularInline):
+    model = IngredientForRecipe
+    autocomplete_fields = ('ingredient', )
+    extra = 1
 
 
 @admin.register(Recipe)
@@ -23,8 +31,25 @@ class RecipeAdmin(admin.ModelAdmin):
         'pk', 'name', 'author', 'tags_list',
         'ingredients_list', 'favorited'
     )
-    search_fields = ('name', 'author', 'tags')
-    list_filter = ('name', 'author', 'tags')
+    list_select_related = ('author', )
+    search_fields = ('name', 'author__username', 'author__email')
+    list_filter = ('tags', )
+    autocomplete_fields = ('author', )
+    # Состав рецепта задаётся в IngredientForRecipeInline, поле
+    # ingredients API не использует
+    exclude = ('ingredients', )
+    inlines = (IngredientForRecipeInline, )
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).prefetch_related(
+            'tags',
+            Prefetch(
+                'ingredient_for_recipe',
+                queryset=IngredientForRecipe.objects.select_related(
+                    'ingredient'
+                ),
+            ),
+        )
 
     def tags_list(self, obj):
         return '\n'.join([str(tags) for tags in obj.tags.all()])
@@ -37,19 +62,22 @@ class RecipeAdmin(admin.ModelAdmin):
             ]
         )
 
+    @admin.display(description='в избранном', ordering='favorites_count')
     def favorited(self, obj):
-        return Favorite.objects.filter(recipe=obj).count()
+        return obj.favorites_count
 
 
 @admin.register(Favorite)
 class FavoriteAdmin(admin.ModelAdmin):
     list_display = ('pk', 'user', 'recipe')
-    search_fields = ('user', )
-    list_filter = ('user', )
+    list_select_related = ('user', 'recipe')
+    search_fields = ('user__username', 'user__email', 'recipe__name')
+    autocomplete_fields = ('user', 'recipe')
 
 
 @admin.register(Cart)
 class CartAdmin(admin.ModelAdmin):
-    list_display = ('pk', 'user', 'recipe')
-    search_fields = ('user', )
-    list_filter = ('user', )
+    list_display = ('pk', 'user', 'recipe', 'servings')
+    list_select_related = ('user', 'recipe')
+    search_fields = ('user__username', 'user__email', 'recipe__name')
+    autocomplete_fields = ('user', 'recipe')
@@ -0,0 +1,117 @@
+from django.db import IntegrityError, transaction
+from django.db.models import Exists, OuterRef
+from django.dispatch import Signal
+
+from foodgram.counters import deferred_counters, increment_counter
+from recipes.models import Cart, Favorite, Recipe
+from recipes.signals import COUNTERS
+
+ADDED = 'added'
+ALREADY_ADDED = 'already_added'
+REMOVED = 'removed'
+NOT_ADDED = 'not_added'
+NOT_FOUND = 'not_found'
+
+# Массовое добавление идёт мимо post_save, поэтому кэши сбрасываются
+# по этому сигналу
+recipes_bulk_changed = Signal()
+
+
+def insert_links(model, user, recipe_ids):
+    """Вставляет связи одним INSERT и возвращает id вставленных рецептов.
+
+    Если параллельный запрос успел вставить часть из них, строки
+    вставляются по одной, чтобы точно знать, какие добавлены здесь.
+    """
+    links = [model(user=user, recipe_id=recipe_id) for recipe_id in recipe_ids]
+    try:
+        with transaction.atomic():
+            model.objects.bulk_create(links)
+        return recipe_ids
+    except IntegrityError:
+        pass
+    inserted_ids = []
+    for link in links:
+        try:
+            with transaction.atomic():
+                model.objects.bulk_create([link])
+        except IntegrityError:
+            continue
+        inserted_ids.append(link.recipe_id)
+    return inserted_ids
+
+
+def add_recipes(model, user, recipe_ids):
+    """Добавляет рецепты в избранное или корзину (model) одним INSERT.
+
+    Возвращает словарь id рецепта -> статус.
+    """
+    with transaction.atomic():
+        found = dict(
+            Recipe.objects.filter(pk__in=recipe_ids).annotate(
+                is_added=Exists(
+                    model.objects.filter(user=user, recipe=OuterRef('pk'))
+                )
+            ).values_list('pk', 'is_added')
+        )
+        new_ids = insert_links(model, user, sorted(
+            recipe_id for recipe_id, is_added in found.items()
+            if not is_added
+        ))
+        if new_ids:
+            increment_counter(
+                Recipe.objects.filter(pk__in=new_ids), COUNTERS[model]
+            )
+            recipes_bulk_changed.send(
+                sender=model, user_id=user.pk, recipe_ids=new_ids
+            )
+    new_ids = set(new_ids)
+    return {
+        recipe_id: (
+            NOT_FOUND if recipe_id not in found
+            else ADDED if recipe_id in new_ids
+            else ALREADY_ADDED
+        )
+        for recipe_id in recipe_ids
+    }
+
+
+def remove_recipes(model, user, recipe_ids):
+    """Убирает рецепты из избранного или корзины (model) одним DELETE."""
+    with transaction.atomic():
+        # Блокировка строк не даёт параллельному запросу удалить их
+        # повторно и второй раз уменьшить счётчики
+        items = model.objects.select_for_update().filter(
+            user=user, recipe_id__in=recipe_ids
+        )
+        removed_ids = sorted(items.values_list('recipe_id', flat=True))
+        if removed_ids:
+            # Счётчики уменьшают обработчики post_delete, здесь они
+            # копятся и пишутся одним UPDATE
+            with deferred_counters():
+                model.objects.filter(
+                    user=user, recipe_id__in=removed_ids
+                ).delete()
+    removed_ids = set(removed_ids)
+    return {
+        recipe_id: REMOVED if recipe_id in removed_ids else NOT_ADDED
+        for recipe_id in recipe_ids
+    }
+
+
+def move_favorites_to_cart(user, recipe_ids=None, remove_from_favorite=False):
+    """Кладёт в корзину избранные рецепты, все или только recipe_ids."""
+    favorites = Favorite.objects.filter(user=user)
+    if recipe_ids is not None:
+        favorites = favorites.filter(recipe_id__in=recipe_ids)
+    favorite_ids = list(favorites.values_list('recipe_id', flat=True))
+    with transaction.atomic():
+        results = add_recipes(Cart, user, favorite_ids)
+        if remove_from_favorite and favorite_ids:
+            remove_recipes(Favorite, user, favorite_ids)
+    if recipe_ids is not None:
+        results.update(
+            (recipe_id, NOT_ADDED) for recipe_id in recipe_ids
+            if recipe_id not in results
+        )
+    return results
@@ -0,0 +1,71 @@
+from django.core.checks import Error, Tags, register
+from django.db import connections
+from django.db.migrations.recorder import MigrationRecorder
+
+from recipes.fulltext import FTS_TABLE, SEARCH_TRIGGERS
+from recipes.models import Recipe
+
+FULLTEXT_MIGRATION = ('recipes', '0010_recipe_fulltext')
+
+
+def get_triggers(connection, table):
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute(
+                "SELECT name FROM sqlite_master "
+                "WHERE type = 'trigger' AND tbl_name = %s",
+                [table],
+            )
+        else:
+            cursor.execute(
+                'SELECT tgname FROM pg_trigger '
+                'WHERE tgrelid = %s::regclass AND NOT tgisinternal',
+                [table],
+            )
+        return {name for name, in cursor.fetchall()}
+
+
+def get_missing_objects(connection):
+    table = Recipe._meta.db_table
+    missing = []
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            if FTS_TABLE not in connection.introspection.table_names(cursor):
+                missing.append(FTS_TABLE)
+    triggers = get_triggers(connection, table)
+    return missing + [
+        name for name in SEARCH_TRIGGERS[connection.vendor]
+        if name not in triggers
+    ]
+
+
+@register(Tags.database)
+def check_fulltext(app_configs=None, databases=None, **kwargs):
+    """Полнотекстовый индекс рецептов держат триггеры, которые SQLite
+    молча удаляет при пересоздании таблицы (например, в AddField),
+    без них поиск перестаёт видеть новые и изменённые рецепты.
+    """
+    errors = []
+    for alias in databases or ():
+        connection = connections[alias]
+        if connection.vendor not in SEARCH_TRIGGERS:
+            continue
+        recorder = MigrationRecorder(connection)
+        if (
+            not recorder.has_table()
+            or FULLTEXT_MIGRATION not in recorder.applied_migrations()
+        ):
+            continue
+        missing = get_missing_objects(connection)
+        if missing:
+            errors.append(Error(
+                f'В бд {alias} нет объектов полнотекстового поиска '
+                f'рецептов: {", ".join(missing)}.',
+                hint=(
+                    'Миграция, пересоздавшая таблицу рецептов, должна '
+                    'заново создать их SQL из recipes 0010_recipe_fulltext.'
+                ),
+                obj=Recipe,
+                id='recipes.E001',
+            ))
+    return errors
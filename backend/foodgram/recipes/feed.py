@@ -0,0 +1,128 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import F, Q
+
+from recipes.models import FeedItem, Recipe
+from users.models import Follow, User
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 1000
+
+_executor = None
+
+
+def is_popular(author_id):
+    """Рецепты популярных авторов не раскладываются по лентам подписчиков,
+    а подмешиваются при чтении, иначе каждая публикация писала бы
+    слишком много строк.
+    """
+    return User.objects.filter(
+        pk=author_id, followers_count__gt=settings.FEED_FANOUT_LIMIT
+    ).exists()
+
+
+def fan_out_recipe(recipe_id, author_id, pub_date):
+    """Раскладывает рецепт по лентам подписчиков автора пачками
+    по BATCH_SIZE, каждая пачка пишется своим запросом.
+    """
+    if is_popular(author_id):
+        return
+    followers = Follow.objects.filter(author_id=author_id).order_by(
+        'user_id'
+    ).values_list('user_id', flat=True)
+    last_id = 0
+    while True:
+        user_ids = list(followers.filter(user_id__gt=last_id)[:BATCH_SIZE])
+        if not user_ids:
+            return
+        FeedItem.objects.bulk_create(
+            [
+                FeedItem(
+                    user_id=user_id,
+                    recipe_id=recipe_id,
+                    author_id=author_id,
+                    pub_date=pub_date,
+                )
+                for user_id in user_ids
+            ],
+            ignore_conflicts=True,
+        )
+        last_id = user_ids[-1]
+
+
+def _run_in_background(*args):
+    try:
+        fan_out_recipe(*args)
+    except Exception:
+        logger.exception('Не удалось разложить рецепт %s по лентам', args[0])
+    finally:
+        connections.close_all()
+
+
+def schedule_fan_out(recipe):
+    """Раскладывает рецепт по лентам после коммита, не блокируя запрос.
+
+    При FEED_FANOUT_WORKERS = 0 рецепт раскладывается синхронно.
+    Пропущенные из-за сбоя записи восстанавливает rebuild_feeds.
+    """
+    global _executor
+    args = (recipe.pk, recipe.author_id, recipe.pub_date)
+    workers = settings.FEED_FANOUT_WORKERS
+    if not workers:
+        transaction.on_commit(lambda: fan_out_recipe(*args))
+        return
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix='recipe-feeds'
+        )
+    transaction.on_commit(lambda: _executor.submit(_run_in_background, *args))
+
+
+def backfill_feed(user_id, author_id):
+    if is_popular(author_id):
+        return
+    recipes = Recipe.objects.filter(author_id=author_id).values_list(
+        'pk', 'pub_date'
+    ).order_by('-pub_date')[:settings.FEED_BACKFILL_SIZE]
+    FeedItem.objects.bulk_create(
+        (
+            FeedItem(
+                user_id=user_id,
+                recipe_id=recipe_id,
+                author_id=author_id,
+                pub_date=pub_date,
+            )
+            for recipe_id, pub_date in recipes
+        ),
+        ignore_conflicts=True,
+    )
+
+
+def prune_feed(user_id, author_id):
+    FeedItem.objects.filter(user_id=user_id, author_id=author_id).delete()
+
+
+def get_feed(queryset, user):
+    """Ограничивает queryset рецептов лентой пользователя.
+
+    Обычно это один проход по индексу feed_user_pub_date_idx, если же
+    пользователь подписан на популярных авторов, их рецепты
+    подмешиваются по индексу recipe_author_pub_date_idx. Дата записи
+    ленты (она совпадает с датой рецепта) доступна как feed_pub_date,
+    по ней и id рецепта ленту листает FeedCursorPagination.
+    """
+    popular_authors = Follow.objects.filter(
+        user=user, author__followers_count__gt=settings.FEED_FANOUT_LIMIT
+    ).values('author_id')
+    if not popular_authors.exists():
+        return queryset.filter(feed_items__user=user).annotate(
+            feed_pub_date=F('feed_items__pub_date')
+        ).order_by('-feed_pub_date', '-id')
+    return queryset.filter(
+        Q(pk__in=FeedItem.objects.filter(user=user).values('recipe_id'))
+        | Q(author__in=popular_authors)
+    ).annotate(feed_pub_date=F('pub_date')).order_by('-feed_pub_date', '-id')
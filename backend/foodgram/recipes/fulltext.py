@@ -0,0 +1,94 @@
+import re
+
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import NotSupportedError, connection
+from django.db.models import F, FloatField, Func, Value
+from django.db.models.expressions import RawSQL
+
+# В Postgres поиск идёт по полю Recipe.search_vector с GIN-индексом,
+# в SQLite - по таблице FTS5. Значения поля и таблицу заполняют триггеры
+# из миграции recipes 0010_recipe_fulltext, их наличие проверяет
+# recipes.checks
+SEARCH_CONFIG = 'russian'
+FTS_TABLE = 'recipes_recipe_fts'
+SEARCH_TRIGGERS = {
+    'postgresql': ('recipes_recipe_search_vector_update', ),
+    'sqlite': tuple(
+        f'{FTS_TABLE}_{action}' for action in ('insert', 'delete', 'update')
+    ),
+}
+WORD = re.compile(r'\w+')
+
+
+class PostgresGinIndex(GinIndex):
+    """GIN-индекс, который создаётся только в Postgres, в SQLite
+    его заменяет таблица FTS5.
+    """
+
+    def create_sql(self, model, schema_editor, *args, **kwargs):
+        if schema_editor.connection.vendor != 'postgresql':
+            return ''
+        return super().create_sql(model, schema_editor, *args, **kwargs)
+
+    def remove_sql(self, model, schema_editor, *args, **kwargs):
+        if schema_editor.connection.vendor != 'postgresql':
+            return ''
+        return super().remove_sql(model, schema_editor, *args, **kwargs)
+
+
+class FTSRank(Func):
+    """Ранг bm25 рецепта с id из второго аргумента по запросу FTS5 из
+    первого, название весит больше описания.
+    """
+    template = (
+        f'(SELECT -bm25({FTS_TABLE}, 10.0, 1.0) FROM {FTS_TABLE} '
+        f'WHERE {FTS_TABLE} MATCH %(expressions)s)'
+    )
+    arg_joiner = f' AND {FTS_TABLE}.rowid = '
+    output_field = FloatField()
+
+
+def search_postgres(queryset, query):
+    search_query = SearchQuery(
+        query, config=SEARCH_CONFIG, search_type='websearch'
+    )
+    return queryset.filter(search_vector=search_query).annotate(
+        search_rank=SearchRank(F('search_vector'), search_query)
+    ).order_by('-search_rank', '-pub_date', '-id')
+
+
+def search_sqlite(queryset, query):
+    # Слова ищутся по префиксу, операторы FTS5 из ввода не пропускаются
+    words = WORD.findall(query)
+    if not words:
+        return queryset.none()
+    match = ' '.join(f'"{word}"*' for word in words)
+    return queryset.filter(
+        pk__in=RawSQL(
+            f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s',
+            (match, ),
+        )
+    ).annotate(
+        search_rank=FTSRank(Value(match), F('pk'))
+    ).order_by('-search_rank', '-pub_date', '-id')
+
+
+SEARCH_BACKENDS = {
+    'postgresql': search_postgres,
+    'sqlite': search_sqlite,
+}
+
+
+def search_recipes(queryset, query):
+    """Полнотекстовый поиск по названию и описанию с ранжированием.
+
+    Название весит больше описания, при равном ранге новые рецепты
+    идут первыми.
+    """
+    backend = SEARCH_BACKENDS.get(connection.vendor)
+    if backend is None:
+        raise NotSupportedError(
+            f'Полнотекстовый поиск не поддерживается для {connection.vendor}'
+        )
+    return backend(queryset, query)
@@ -0,0 +1,130 @@
+import hashlib
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from pathlib import PurePosixPath
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import connections, transaction
+from django.dispatch import Signal
+from PIL import Image
+
+from recipes.models import Recipe
+
+logger = logging.getLogger(__name__)
+
+IMAGE_VARIANTS = {
+    'card': (480, 480),
+    'detail': (1200, 1200),
+}
+SAVE_FORMATS = {
+    'jpg': 'JPEG',
+    'png': 'PNG',
+    'webp': 'WEBP',
+}
+
+# Отправляется после того, как у рецепта появились новые копии картинки
+image_variants_ready = Signal()
+
+_executor = None
+
+
+def get_image_field():
+    return Recipe._meta.get_field('image')
+
+
+def content_hash(content):
+    return hashlib.sha256(content).hexdigest()
+
+
+def variant_name(image_name, variant, extension):
+    stem = PurePosixPath(image_name).stem
+    return f'recipes/variants/{stem}/{variant}.{extension}'
+
+
+def variants_ready(recipe):
+    return bool(recipe.image) and (
+        recipe.image_variants.get('source') == recipe.image.name
+    )
+
+
+def get_image_url(recipe, variant=None):
+    """URL картинки рецепта: готовый вариант или, пока его нет, оригинал."""
+    if not recipe.image:
+        return None
+    if variant and variants_ready(recipe):
+        return get_image_field().storage.url(recipe.image_variants[variant])
+    return recipe.image.url
+
+
+def save_variant(storage, image, name, extension):
+    if storage.exists(name):
+        return
+    save_format = SAVE_FORMATS[extension]
+    if save_format == 'JPEG' and image.mode != 'RGB':
+        image = image.convert('RGB')
+    elif image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA')
+    buffer = BytesIO()
+    image.save(buffer, save_format, quality=85, optimize=True)
+    storage.save(name, ContentFile(buffer.getvalue()))
+
+
+def generate_image_variants(recipe_id, image_name):
+    storage = get_image_field().storage
+    with storage.open(image_name) as file:
+        image = Image.open(file)
+        image.load()
+    extension = PurePosixPath(image_name).suffix.lstrip('.').lower()
+    if extension == 'jpeg':
+        extension = 'jpg'
+    if extension not in ('jpg', 'png'):
+        extension = 'png'
+    variants = {'source': image_name}
+    for variant, size in IMAGE_VARIANTS.items():
+        thumbnail = image.copy()
+        thumbnail.thumbnail(size)
+        for key, ext in ((variant, extension), (f'{variant}_webp', 'webp')):
+            name = variant_name(image_name, variant, ext)
+            save_variant(storage, thumbnail, name, ext)
+            variants[key] = name
+    updated = Recipe.objects.filter(pk=recipe_id, image=image_name).update(
+        image_variants=variants
+    )
+    if updated:
+        image_variants_ready.send(sender=Recipe, recipe_id=recipe_id)
+
+
+def _run_in_background(recipe_id, image_name):
+    try:
+        generate_image_variants(recipe_id, image_name)
+    except Exception:
+        logger.exception(
+            'Не удалось обработать картинку %s рецепта %s',
+            image_name, recipe_id,
+        )
+    finally:
+        connections.close_all()
+
+
+def schedule_image_variants(recipe):
+    """Запускает генерацию превью после коммита, не блокируя запрос.
+
+    При IMAGE_PROCESSING_WORKERS = 0 превью строятся синхронно.
+    """
+    global _executor
+    recipe_id, image_name = recipe.pk, recipe.image.name
+    workers = settings.IMAGE_PROCESSING_WORKERS
+    if not workers:
+        transaction.on_commit(
+            lambda: generate_image_variants(recipe_id, image_name)
+        )
+        return
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix='recipe-images'
+        )
+    transaction.on_commit(
+        lambda: _executor.submit(_run_in_background, recipe_id, image_name)
+    )
@@ -0,0 +1,74 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.filters import SpecialIngredientFilter
+from recipes.models import Ingredient
+from recipes.search import ingredient_index
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает поиск ингредиентов через индекс в памяти '
+        'с фильтром по базе данных'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--queries', type=int, default=500)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def make_queries(self, count, seed):
+        names = list(Ingredient.objects.values_list('name', flat=True))
+        if not names:
+            raise CommandError(
+                'Нет ингредиентов, сначала выполните load_ingredients'
+            )
+        rng = random.Random(seed)
+        queries = []
+        for _ in range(count):
+            name = rng.choice(names)
+            length = rng.randint(1, min(len(name), 6))
+            start = 0 if rng.random() < 0.7 else rng.randint(
+                0, len(name) - length
+            )
+            queries.append(name[start:start + length])
+        return queries
+
+    def measure(self, queries, search):
+        timings = []
+        for query in queries:
+            started = time.perf_counter()
+            search(query)
+            timings.append(time.perf_counter() - started)
+        timings.sort()
+        return (
+            sum(timings) / len(timings) * 1000,
+            timings[int(len(timings) * 0.95) - 1] * 1000,
+        )
+
+    def handle(self, *args, **options):
+        queries = self.make_queries(options['queries'], options['seed'])
+
+        def database_search(query):
+            return list(SpecialIngredientFilter(
+                {'name': query}, queryset=Ingredient.objects.all()
+            ).qs)
+
+        started = time.perf_counter()
+        ingredient_index.invalidate()
+        ingredient_index.search('')
+        build_time = (time.perf_counter() - started) * 1000
+
+        results = (
+            ('database', self.measure(queries, database_search)),
+            ('index', self.measure(queries, ingredient_index.search)),
+        )
+        self.stdout.write(
+            f'Запросов: {len(queries)}, построение индекса: '
+            f'{build_time:.1f} мс'
+        )
+        for name, (mean, p95) in results:
+            self.stdout.write(
+                f'{name:>8}: среднее {mean:.3f} мс, p95 {p95:.3f} мс'
+            )
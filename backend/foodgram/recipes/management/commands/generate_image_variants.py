@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from recipes.images import generate_image_variants, variants_ready
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    help = 'Строит уменьшенные копии картинок для уже загруженных рецептов'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Перестроить копии, даже если они уже готовы',
+        )
+
+    def handle(self, *args, **options):
+        recipes = Recipe.objects.exclude(image='').only(
+            'id', 'image', 'image_variants'
+        )
+        processed = 0
+        for recipe in recipes.iterator():
+            if variants_ready(recipe) and not options['force']:
+                continue
+            generate_image_variants(recipe.id, recipe.image.name)
+            processed += 1
+        self.stdout.write(self.style.SUCCESS(
+            f'Обработано картинок: {processed}'
+        ))
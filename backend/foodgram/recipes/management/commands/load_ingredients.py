@@ -1,22 +1,119 @@
-from django.core.management.base import BaseCommand
-
+import csv
 import json
+import time
+from itertools import islice
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
 
 from recipes.models import Ingredient
+from recipes.search import ingredient_index
+
+DEFAULT_PATH = settings.INGREDIENTS_DATA_DIR / 'ingredients.json'
+CHUNK_SIZE = 64 * 1024
+# Сколько номеров пропущенных строк показывать в отчёте
+SKIPPED_SHOWN = 10
+
+
+# Читатели отдают (номер строки или записи, название, единица измерения)
+def read_csv(file):
+    reader = csv.reader(file)
+    for row in reader:
+        # Пустые строки пропускаются молча, неполные - с отчётом
+        if any(value.strip() for value in row):
+            name, measurement_unit, *_ = [*row, '', '']
+            yield reader.line_num, name, measurement_unit
 
 
+def read_json(file):
+    decoder = json.JSONDecoder()
+    buffer = file.read(CHUNK_SIZE).lstrip()
+    if not buffer.startswith('['):
+        raise CommandError('Ожидался JSON-массив ингредиентов')
+    buffer = buffer[1:]
+    end_of_file = False
+    number = 0
+    while True:
+        buffer = buffer.lstrip(' \t\r\n,')
+        if buffer.startswith(']'):
+            return
+        try:
+            item, end = decoder.raw_decode(buffer)
+        except json.JSONDecodeError:
+            if end_of_file:
+                raise CommandError('Некорректный JSON-файл')
+            chunk = file.read(CHUNK_SIZE)
+            end_of_file = not chunk
+            buffer += chunk
+            continue
+        buffer = buffer[end:]
+        number += 1
+        yield number, item.get('name', ''), item.get('measurement_unit', '')
+
+
+def valid_rows(rows, skipped):
+    """Строки с названием и единицей измерения, номера остальных
+    попадают в skipped.
+    """
+    for number, name, measurement_unit in rows:
+        if name.strip() and measurement_unit.strip():
+            yield name, measurement_unit
+        else:
+            skipped.append(number)
+
 
 class Command(BaseCommand):
     help = 'Загружает в бд большой список ингредиентов'
 
-    def handle(self, *args, **kwargs):
-        path_for_file = './recipes/management/commands/ingredients.json'
-
-        f = open(path_for_file, 'r')
-        data = json.load(f)
-        for i in data:
-            Ingredient.objects.create(
-                name=i['name'],
-                measurement_unit=i['measurement_unit']
-            )
-        f.close()
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path',
+            nargs='?',
+            default=DEFAULT_PATH,
+            type=Path,
+            help='Путь к файлу ingredients.json или ingredients.csv',
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        path = options['path']
+        batch_size = options['batch_size']
+        readers = {'.json': read_json, '.csv': read_csv}
+        if path.suffix not in readers:
+            raise CommandError('Поддерживаются только файлы .json и .csv')
+        if batch_size < 1:
+            raise CommandError('Размер пачки должен быть больше нуля')
+
+        started = time.perf_counter()
+        total = 0
+        skipped = []
+        with open(path, encoding='utf-8') as file, transaction.atomic():
+            count_before = Ingredient.objects.count()
+            rows = valid_rows(readers[path.suffix](file), skipped)
+            while True:
+                batch = [
+                    Ingredient(name=name, measurement_unit=measurement_unit)
+                    for name, measurement_unit in islice(rows, batch_size)
+                ]
+                if not batch:
+                    break
+                Ingredient.objects.bulk_create(batch, ignore_conflicts=True)
+                total += len(batch)
+            created = Ingredient.objects.count() - count_before
+        # bulk_create не отправляет сигналов, индекс поиска сбрасывается здесь
+        if created:
+            ingredient_index.invalidate()
+        elapsed = time.perf_counter() - started
+        if skipped:
+            shown = ', '.join(map(str, skipped[:SKIPPED_SHOWN]))
+            more = '...' if len(skipped) > SKIPPED_SHOWN else ''
+            self.stderr.write(self.style.WARNING(
+                f'Пропущено {len(skipped)} записей без названия или '
+                f'единицы измерения, номера: {shown}{more}'
+            ))
+        self.stdout.write(self.style.SUCCESS(
+            f'Прочитано {total} строк, добавлено {created} ингредиентов '
+            f'за {elapsed:.2f} с ({total / elapsed:.0f} строк/с)'
+        ))
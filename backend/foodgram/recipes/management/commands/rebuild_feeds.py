@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from recipes.feed import backfill_feed
+from recipes.models import FeedItem
+from users.models import Follow
+
+
+class Command(BaseCommand):
+    help = 'Заново собирает ленты подписок из последних рецептов авторов'
+
+    @transaction.atomic
+    def handle(self, *args, **kwargs):
+        FeedItem.objects.all().delete()
+        follows = Follow.objects.values_list('user_id', 'author_id')
+        for user_id, author_id in follows.iterator():
+            backfill_feed(user_id, author_id)
+        self.stdout.write(
+            f'Записей в лентах: {FeedItem.objects.count()}'
+        )
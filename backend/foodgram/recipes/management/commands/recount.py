@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from recipes.models import Cart, Favorite, Recipe
+from users.models import Follow, User
+
+COUNTERS = (
+    (Recipe, 'favorites_count', Favorite, 'recipe'),
+    (Recipe, 'in_carts_count', Cart, 'recipe'),
+    (User, 'recipes_count', Recipe, 'author'),
+    (User, 'followers_count', Follow, 'author'),
+)
+
+
+def count_subquery(model, field):
+    return Coalesce(
+        Subquery(
+            model.objects.filter(
+                **{field: OuterRef('pk')}
+            ).order_by().values(field).annotate(
+                total=Count('pk')
+            ).values('total')
+        ),
+        Value(0),
+    )
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает счётчики избранного, корзин, рецептов и подписчиков'
+
+    @transaction.atomic
+    def handle(self, *args, **kwargs):
+        for model, counter, related_model, field in COUNTERS:
+            total = count_subquery(related_model, field)
+            fixed = model.objects.exclude(**{counter: total}).update(
+                **{counter: total}
+            )
+            self.stdout.write(
+                f'{model.__name__}.{counter}: '
+                f'исправлено {fixed}'
+            )
@@ -0,0 +1,165 @@
+import random
+import time
+from datetime import timedelta
+from secrets import token_hex
+
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from recipes.models import (Cart, Favorite, Ingredient, IngredientForRecipe,
+                            Recipe, Tag)
+from users.models import Follow, User
+
+DEFAULT_TAGS = (
+    ('Завтрак', '#E26C2D', 'breakfast'),
+    ('Обед', '#49B64E', 'lunch'),
+    ('Ужин', '#8775D2', 'dinner'),
+)
+BATCH_SIZE = 1000
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет бд синтетическими пользователями, рецептами, '
+        'подписками, избранным и корзинами для нагрузочных тестов'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--recipes', type=int, default=1000)
+        parser.add_argument('--follows', type=int, default=10)
+        parser.add_argument('--favorites', type=int, default=20)
+        parser.add_argument('--carts', type=int, default=5)
+        parser.add_argument('--ingredients-per-recipe', type=int, default=8)
+        parser.add_argument(
+            '--ingredients',
+            help='Файл каталога (например data/ingredients.csv), '
+                 'который нужно загрузить перед заполнением',
+        )
+        parser.add_argument('--seed', type=int, default=None)
+        parser.add_argument('--password', default='benchmark')
+
+    def sample(self, population, count):
+        return self.random.sample(population, min(count, len(population)))
+
+    def create_users(self, count, password):
+        tag = token_hex(3)
+        password = make_password(password)
+        return User.objects.bulk_create(
+            (
+                User(
+                    username=f'bench_{tag}_{i}',
+                    email=f'bench_{tag}_{i}@example.com',
+                    first_name='Бенчмарк',
+                    last_name=f'Пользователь {i}',
+                    password=password,
+                )
+                for i in range(count)
+            ),
+            batch_size=BATCH_SIZE,
+        )
+
+    def create_recipes(self, count, users, tags, ingredient_ids, per_recipe):
+        recipes = Recipe.objects.bulk_create(
+            (
+                Recipe(
+                    author=self.random.choice(users),
+                    name=f'Рецепт {i}',
+                    text='Синтетический рецепт для нагрузочного теста.',
+                    cooking_time=self.random.randint(5, 180),
+                )
+                for i in range(count)
+            ),
+            batch_size=BATCH_SIZE,
+        )
+        now = timezone.now()
+        for recipe in recipes:
+            recipe.pub_date = now - timedelta(
+                minutes=self.random.randint(0, 365 * 24 * 60)
+            )
+        Recipe.objects.bulk_update(
+            recipes, ['pub_date'], batch_size=BATCH_SIZE
+        )
+        Recipe.tags.through.objects.bulk_create(
+            (
+                Recipe.tags.through(recipe_id=recipe.id, tag_id=tag.id)
+                for recipe in recipes
+                for tag in self.sample(tags, self.random.randint(1, 3))
+            ),
+            batch_size=BATCH_SIZE,
+        )
+        IngredientForRecipe.objects.bulk_create(
+            (
+                IngredientForRecipe(
+                    recipe_id=recipe.id,
+                    ingredient_id=ingredient_id,
+                    amount=self.random.randint(1, 500),
+                )
+                for recipe in recipes
+                for ingredient_id in self.sample(
+                    ingredient_ids,
+                    self.random.randint(
+                        max(1, per_recipe // 2), per_recipe * 3 // 2
+                    ),
+                )
+            ),
+            batch_size=BATCH_SIZE,
+        )
+        return recipes
+
+    def create_links(self, model, field, users, targets, count,
+                     exclude_self=False):
+        model.objects.bulk_create(
+            (
+                model(user_id=user.id, **{f'{field}_id': target.id})
+                for user in users
+                for target in self.sample(targets, count)
+                if not (exclude_self and target.id == user.id)
+            ),
+            batch_size=BATCH_SIZE,
+            ignore_conflicts=True,
+        )
+
+    @transaction.atomic
+    def handle(self, *args, **options):
+        self.random = random.Random(options['seed'])
+        started = time.perf_counter()
+        if options['ingredients']:
+            call_command('load_ingredients', options['ingredients'])
+        ingredient_ids = list(Ingredient.objects.values_list('id', flat=True))
+        if not ingredient_ids:
+            raise CommandError(
+                'Нет ингредиентов: выполните load_ingredients или передайте '
+                '--ingredients data/ingredients.csv'
+            )
+        tags = list(Tag.objects.all())
+        if not tags:
+            tags = Tag.objects.bulk_create(
+                Tag(name=name, color=color, slug=slug)
+                for name, color, slug in DEFAULT_TAGS
+            )
+
+        users = self.create_users(options['users'], options['password'])
+        recipes = self.create_recipes(
+            options['recipes'], users, tags, ingredient_ids,
+            options['ingredients_per_recipe'],
+        )
+        self.create_links(
+            Follow, 'author', users, users, options['follows'],
+            exclude_self=True,
+        )
+        self.create_links(
+            Favorite, 'recipe', users, recipes, options['favorites']
+        )
+        self.create_links(Cart, 'recipe', users, recipes, options['carts'])
+        call_command('recount', stdout=self.stdout)
+        call_command('rebuild_feeds', stdout=self.stdout)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Создано {len(users)} пользователей и {len(recipes)} рецептов '
+            f'за {time.perf_counter() - started:.1f} с, '
+            f'пароль: {options["password"]}'
+        ))
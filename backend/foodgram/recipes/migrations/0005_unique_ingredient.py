@@ -0,0 +1,51 @@
+# Generated by Django 4.0.1 on 2026-10-18 02:27
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def merge_duplicate_ingredients(apps, schema_editor):
+    Ingredient = apps.get_model('recipes', 'Ingredient')
+    IngredientForRecipe = apps.get_model('recipes', 'IngredientForRecipe')
+    duplicates = Ingredient.objects.values(
+        'name', 'measurement_unit'
+    ).annotate(keep_id=Min('id'), total=Count('id')).filter(total__gt=1)
+    for duplicate in duplicates:
+        keep_id = duplicate['keep_id']
+        extra_ids = list(Ingredient.objects.filter(
+            name=duplicate['name'],
+            measurement_unit=duplicate['measurement_unit'],
+        ).exclude(id=keep_id).values_list('id', flat=True))
+        for extra_id in extra_ids:
+            used_by = IngredientForRecipe.objects.filter(
+                ingredient_id=keep_id
+            ).values('recipe_id')
+            IngredientForRecipe.objects.filter(
+                ingredient_id=extra_id, recipe_id__in=used_by
+            ).delete()
+            IngredientForRecipe.objects.filter(
+                ingredient_id=extra_id
+            ).update(ingredient_id=keep_id)
+        Ingredient.objects.filter(id__in=extra_ids).delete()
+    if schema_editor.connection.vendor == 'postgresql':
+        # Внешние ключи в Postgres отложенные: без этого проверки удалений
+        # остались бы до конца транзакции, и ALTER TABLE ниже упал бы
+        # с "pending trigger events"
+        schema_editor.execute('SET CONSTRAINTS ALL IMMEDIATE')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0004_alter_cart_options_alter_favorite_options_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            merge_duplicate_ingredients, migrations.RunPython.noop
+        ),
+        migrations.AddConstraint(
+            model_name='ingredient',
+            constraint=models.UniqueConstraint(fields=('name', 'measurement_unit'), name='unique_ingredient'),
+        ),
+    ]
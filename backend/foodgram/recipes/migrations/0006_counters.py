@@ -0,0 +1,52 @@
+# Generated by Django 4.0.1 on 2026-10-18 02:30
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def fill_counters(apps, schema_editor):
+    counters = (
+        ('recipes', 'Recipe', 'favorites_count', 'Favorite', 'recipe'),
+        ('recipes', 'Recipe', 'in_carts_count', 'Cart', 'recipe'),
+        ('users', 'User', 'recipes_count', 'Recipe', 'author'),
+        ('users', 'User', 'followers_count', 'Follow', 'author'),
+    )
+    for app_label, model_name, counter, related_name, field in counters:
+        related_app = 'users' if related_name == 'Follow' else 'recipes'
+        related_model = apps.get_model(related_app, related_name)
+        total = Coalesce(
+            Subquery(
+                related_model.objects.filter(
+                    **{field: OuterRef('pk')}
+                ).order_by().values(field).annotate(
+                    total=Count('pk')
+                ).values('total')
+            ),
+            Value(0),
+        )
+        apps.get_model(app_label, model_name).objects.update(
+            **{counter: total}
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0005_unique_ingredient'),
+        ('users', '0003_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='favorites_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='в избранном'),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='in_carts_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='в корзинах'),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
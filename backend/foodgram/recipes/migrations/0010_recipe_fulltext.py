@@ -0,0 +1,105 @@
+# Generated by Django 4.0.1 on 2026-10-18 02:48
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+import recipes.fulltext
+
+SEARCH_CONFIG = 'russian'
+FTS_TABLE = 'recipes_recipe_fts'
+# Столбец и индекс описаны в модели, здесь только триггеры
+POSTGRES_FORWARD = (
+    f'''
+    CREATE FUNCTION recipes_recipe_search_vector() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('{SEARCH_CONFIG}',
+                                  coalesce(NEW.name, '')), 'A')
+            || setweight(to_tsvector('{SEARCH_CONFIG}',
+                                     coalesce(NEW.text, '')), 'B');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    ''',
+    '''
+    CREATE TRIGGER recipes_recipe_search_vector_update
+    BEFORE INSERT OR UPDATE OF name, text ON recipes_recipe
+    FOR EACH ROW EXECUTE FUNCTION recipes_recipe_search_vector()
+    ''',
+    'UPDATE recipes_recipe SET name = name',
+)
+POSTGRES_BACKWARD = (
+    'DROP TRIGGER recipes_recipe_search_vector_update ON recipes_recipe',
+    'DROP FUNCTION recipes_recipe_search_vector()',
+)
+SQLITE_FORWARD = (
+    f'''
+    CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(
+        name, text, content='recipes_recipe', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    ''',
+    f'''
+    CREATE TRIGGER {FTS_TABLE}_insert AFTER INSERT ON recipes_recipe BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, name, text)
+        VALUES (new.id, new.name, new.text);
+    END
+    ''',
+    f'''
+    CREATE TRIGGER {FTS_TABLE}_delete AFTER DELETE ON recipes_recipe BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, text)
+        VALUES ('delete', old.id, old.name, old.text);
+    END
+    ''',
+    f'''
+    CREATE TRIGGER {FTS_TABLE}_update AFTER UPDATE OF name, text
+    ON recipes_recipe BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, text)
+        VALUES ('delete', old.id, old.name, old.text);
+        INSERT INTO {FTS_TABLE}(rowid, name, text)
+        VALUES (new.id, new.name, new.text);
+    END
+    ''',
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+)
+SQLITE_BACKWARD = (
+    f'DROP TRIGGER {FTS_TABLE}_insert',
+    f'DROP TRIGGER {FTS_TABLE}_delete',
+    f'DROP TRIGGER {FTS_TABLE}_update',
+    f'DROP TABLE {FTS_TABLE}',
+)
+
+SQL = {
+    'postgresql': (POSTGRES_FORWARD, POSTGRES_BACKWARD),
+    'sqlite': (SQLITE_FORWARD, SQLITE_BACKWARD),
+}
+
+
+def run_sql(forward):
+    def run(apps, schema_editor):
+        statements = SQL.get(schema_editor.connection.vendor)
+        if statements is None:
+            return
+        for statement in statements[0 if forward else 1]:
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0009_feed'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True, verbose_name='поисковый вектор'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=recipes.fulltext.PostgresGinIndex(fields=['search_vector'], name='recipe_search_vector_idx'),
+        ),
+        migrations.RunPython(run_sql(True), run_sql(False)),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 4.0.1 on 2026-10-18 02:56
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0010_recipe_fulltext'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cart',
+            name='servings',
+            field=models.PositiveSmallIntegerField(default=1, validators=[django.core.validators.MinValueValidator(1, 'Количество порций не может быть меньше одного')], verbose_name='порции'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 4.0.1 on 2026-10-18 03:33
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0011_cart_servings'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='ingredientforrecipe',
+            name='amount',
+            field=models.PositiveIntegerField(default=1, validators=[django.core.validators.MinValueValidator(1, 'Количество не может быть меньше одного')], verbose_name='количество'),
+        ),
+    ]
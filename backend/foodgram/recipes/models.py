@@ -1,6 +1,9 @@
+from django.contrib.postgres.search import SearchVectorField
 from django.core.validators import MinValueValidator
 from django.db import models
 
+from foodgram.counters import deferred_counters
+from recipes.fulltext import PostgresGinIndex
 from users.models import User
 
 
@@ -44,11 +47,31 @@ class Ingredient(models.Model):
         verbose_name = 'ингредиент'
         verbose_name_plural = 'ингредиенты'
         ordering = ['id']
+        constraints = [
+            models.UniqueConstraint(
+                name='unique_ingredient',
+                fields=('name', 'measurement_unit'),
+            )
+        ]
 
     def __str__(self):
         return self.name
 
 
+class RecipeQuerySet(models.QuerySet):
+
+    def delete(self):
+        with deferred_counters(self.model):
+            return super().delete()
+
+
+class RecipeManager(models.Manager.from_queryset(RecipeQuerySet)):
+
+    def get_queryset(self):
+        # Вектор нужен только в условиях поиска, читать его незачем
+        return super().get_queryset().defer('search_vector')
+
+
 class Recipe(models.Model):
 
     tags = models.ManyToManyField(
@@ -77,6 +100,12 @@ class Recipe(models.Model):
         blank=True,
         verbose_name='картинка',
     )
+    image_variants = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        verbose_name='уменьшенные копии картинки',
+    )
     text = models.TextField(verbose_name='описание', )
     cooking_time = models.IntegerField(
         validators=(MinValueValidator(
@@ -88,11 +117,48 @@ class Recipe(models.Model):
         auto_now_add=True,
         verbose_name='дата публикации'
     )
+    favorites_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='в избранном',
+    )
+    in_carts_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='в корзинах',
+    )
+    # Заполняется триггером в Postgres, см. recipes.fulltext
+    search_vector = SearchVectorField(
+        null=True,
+        editable=False,
+        verbose_name='поисковый вектор',
+    )
+
+    objects = RecipeManager()
 
     class Meta:
         verbose_name = 'рецепт'
         verbose_name_plural = 'рецепты'
         ordering = ('-pub_date', )
+        indexes = [
+            models.Index(
+                name='recipe_pub_date_idx',
+                fields=('-pub_date', '-id'),
+            ),
+            models.Index(
+                name='recipe_author_pub_date_idx',
+                fields=('author', '-pub_date'),
+            ),
+            PostgresGinIndex(
+                name='recipe_search_vector_idx',
+                fields=('search_vector', ),
+            ),
+        ]
+
+    def delete(self, *args, **kwargs):
+        # Каскадное удаление обновляет счётчики связанных объектов разом
+        with deferred_counters(type(self)):
+            return super().delete(*args, **kwargs)
 
 
 class IngredientForRecipe(models.Model):
@@ -154,6 +220,12 @@ class Favorite(models.Model):
                 fields=('user', 'recipe'),
             )
         ]
+        indexes = [
+            models.Index(
+                name='favorite_recipe_user_idx',
+                fields=('recipe', 'user'),
+            ),
+        ]
 
 
 class Cart(models.Model):
@@ -169,6 +241,15 @@ class Cart(models.Model):
         related_name='cart',
         verbose_name='рецепт',
     )
+    servings = models.PositiveSmallIntegerField(
+        default=1,
+        validators=(
+            MinValueValidator(
+                1, 'Количество порций не может быть меньше одного'
+            ),
+        ),
+        verbose_name='порции',
+    )
 
     class Meta:
         verbose_name = 'корзина'
@@ -180,3 +261,53 @@ class Cart(models.Model):
                 fields=('user', 'recipe'),
             )
         ]
+        indexes = [
+            models.Index(
+                name='cart_recipe_user_idx',
+                fields=('recipe', 'user'),
+            ),
+        ]
+
+
+class FeedItem(models.Model):
+    """Рецепт в ленте подписчика автора, см. recipes.feed."""
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='feed',
+        verbose_name='пользователь',
+    )
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='feed_items',
+        verbose_name='рецепт',
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='автор',
+    )
+    pub_date = models.DateTimeField(verbose_name='дата публикации')
+
+    class Meta:
+        verbose_name = 'запись ленты'
+        verbose_name_plural = 'лента'
+        constraints = [
+            models.UniqueConstraint(
+                name='unique_feed_item',
+                fields=('user', 'recipe'),
+            )
+        ]
+        indexes = [
+            models.Index(
+                name='feed_user_pub_date_idx',
+                fields=('user', '-pub_date', '-recipe'),
+            ),
+            models.Index(
+                name='feed_user_author_idx',
+                fields=('user', 'author'),
+            ),
+        ]
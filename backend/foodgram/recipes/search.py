@@ -0,0 +1,107 @@
+import threading
+from bisect import bisect_left
+
+from foodgram.db_router import read_from_primary
+from foodgram.versions import aget_version, bump_versions, get_version
+from recipes.models import Ingredient
+
+INDEX_VERSION_KEY = 'recipes:ingredient_index_version'
+
+
+def trigrams(value):
+    return {value[i:i + 3] for i in range(len(value) - 2)}
+
+
+class IngredientSearchIndex:
+    """Поиск ингредиентов по названию без обращения к базе.
+
+    Индекс строится лениво при первом поиске: отсортированный список
+    названий для поиска по префиксу и триграммный индекс для поиска
+    по подстроке. Индекс помнит версию из общего кэша, с которой
+    построен, сохранение или удаление ингредиента сбрасывает её,
+    и индекс перестраивается во всех процессах.
+    """
+
+    def __init__(self, version_key=INDEX_VERSION_KEY):
+        self.version_key = version_key
+        self._lock = threading.Lock()
+        self._version = None
+        self._names = []
+        self._ingredients = []
+        self._trigrams = {}
+
+    def invalidate(self):
+        bump_versions(self.version_key)
+
+    def _build(self, version):
+        with read_from_primary():
+            ingredients = list(Ingredient.objects.all())
+        ingredients = sorted(
+            ingredients,
+            key=lambda ingredient: (ingredient.name.lower(), ingredient.id),
+        )
+        names = [ingredient.name.lower() for ingredient in ingredients]
+        index = {}
+        for position, name in enumerate(names):
+            for trigram in trigrams(name):
+                index.setdefault(trigram, set()).add(position)
+        self._ingredients = ingredients
+        self._names = names
+        self._trigrams = index
+        # Версия читается до построения: если её сбросят во время
+        # построения, индекс перестроится при следующем поиске
+        self._version = version
+
+    def _snapshot(self):
+        version = get_version(self.version_key)
+        with self._lock:
+            if self._version != version:
+                self._build(version)
+            return self._names, self._ingredients, self._trigrams
+
+    def search(self, query):
+        return self._search(self._snapshot(), query)
+
+    async def asearch_if_fresh(self, query):
+        """Ищет, только если индекс построен с текущей версией,
+        иначе возвращает None.
+        """
+        version = await aget_version(self.version_key)
+        with self._lock:
+            if self._version != version:
+                return None
+            snapshot = self._names, self._ingredients, self._trigrams
+        return self._search(snapshot, query)
+
+    def _search(self, snapshot, query):
+        names, ingredients, index = snapshot
+        query = query.strip().lower()
+        if not query:
+            return list(ingredients)
+
+        start = bisect_left(names, query)
+        end = start
+        while end < len(names) and names[end].startswith(query):
+            end += 1
+        prefix_matches = range(start, end)
+
+        if len(query) < 3:
+            candidates = range(len(names))
+        else:
+            sets = sorted(
+                (index.get(trigram, set()) for trigram in trigrams(query)),
+                key=len,
+            )
+            candidates = sorted(set.intersection(*sets))
+        contains_matches = [
+            position for position in candidates
+            if (position < start or position >= end)
+            and query in names[position]
+        ]
+        return [
+            ingredients[position]
+            for position in (*prefix_matches, *contains_matches)
+        ]
+
+
+ingredient_index = IngredientSearchIndex()
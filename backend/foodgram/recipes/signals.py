@@ -0,0 +1,73 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from foodgram.counters import change_counter, is_deleting
+from recipes.feed import backfill_feed, prune_feed, schedule_fan_out
+from recipes.images import schedule_image_variants, variants_ready
+from recipes.models import Cart, Favorite, Ingredient, Recipe
+from recipes.search import ingredient_index
+from users.models import Follow, User
+
+COUNTERS = {
+    Favorite: 'favorites_count',
+    Cart: 'in_carts_count',
+}
+
+
+@receiver([post_save, post_delete], sender=Ingredient)
+def invalidate_ingredient_index(sender, **kwargs):
+    transaction.on_commit(ingredient_index.invalidate)
+
+
+@receiver(post_save, sender=Recipe)
+def increment_recipes_count(sender, instance, created, **kwargs):
+    if created:
+        change_counter(User, instance.author_id, 'recipes_count', 1)
+
+
+@receiver(post_save, sender=Recipe)
+def push_recipe_to_feeds(sender, instance, created, **kwargs):
+    if created:
+        schedule_fan_out(instance)
+
+
+@receiver(post_save, sender=Follow)
+def fill_follower_feed(sender, instance, created, **kwargs):
+    if created:
+        backfill_feed(instance.user_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Follow)
+def clean_follower_feed(sender, instance, **kwargs):
+    # Ленты удаляемого пользователя и записи его рецептов в чужих лентах
+    # удаляются каскадом
+    if not is_deleting(User):
+        prune_feed(instance.user_id, instance.author_id)
+
+
+@receiver(post_save, sender=Recipe)
+def process_recipe_image(sender, instance, **kwargs):
+    if instance.image and not variants_ready(instance):
+        schedule_image_variants(instance)
+
+
+@receiver(post_delete, sender=Recipe)
+def decrement_recipes_count(sender, instance, **kwargs):
+    if not is_deleting(User):
+        change_counter(User, instance.author_id, 'recipes_count', -1)
+
+
+@receiver(post_save, sender=Favorite)
+@receiver(post_save, sender=Cart)
+def increment_recipe_counter(sender, instance, created, **kwargs):
+    if created:
+        change_counter(Recipe, instance.recipe_id, COUNTERS[sender], 1)
+
+
+@receiver(post_delete, sender=Favorite)
+@receiver(post_delete, sender=Cart)
+def decrement_recipe_counter(sender, instance, **kwargs):
+    # Счётчики удаляемого рецепта обновлять незачем
+    if not is_deleting(Recipe):
+        change_counter(Recipe, instance.recipe_id, COUNTERS[sender], -1)
@@ -0,0 +1,80 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from recipes.checks import check_fulltext
+from recipes.fulltext import SEARCH_TRIGGERS, search_recipes
+from recipes.models import Recipe
+from users.models import User
+
+DROP_TRIGGER = {
+    'postgresql': 'DROP TRIGGER {} ON recipes_recipe',
+    'sqlite': 'DROP TRIGGER {}',
+}
+
+
+class FulltextTests(TestCase):
+
+    def setUp(self):
+        author = User.objects.create_user(
+            username='author', email='author@example.com', password='password'
+        )
+        self.soup = Recipe.objects.create(
+            author=author, name='Борщ', text='Суп со свёклой', cooking_time=5
+        )
+        self.salad = Recipe.objects.create(
+            author=author, name='Винегрет', text='Салат, как борщ',
+            cooking_time=5,
+        )
+
+    def test_name_ranks_above_text(self):
+        self.assertEqual(
+            list(search_recipes(Recipe.objects.all(), 'борщ')),
+            [self.soup, self.salad],
+        )
+
+    def test_search_works_in_subqueries(self):
+        found = search_recipes(Recipe.objects.all(), 'свёклой')
+        self.assertEqual(
+            list(Recipe.objects.filter(pk__in=found.values('pk'))),
+            [self.soup],
+        )
+
+    def test_changes_reach_the_index(self):
+        self.salad.name = 'Свекольник'
+        self.salad.save()
+        self.assertEqual(
+            list(search_recipes(Recipe.objects.all(), 'свекольник')),
+            [self.salad],
+        )
+
+    def test_check_reports_missing_triggers(self):
+        self.assertEqual(check_fulltext(databases=['default']), [])
+        trigger = SEARCH_TRIGGERS[connection.vendor][0]
+        with connection.cursor() as cursor:
+            cursor.execute(DROP_TRIGGER[connection.vendor].format(trigger))
+        errors = check_fulltext(databases=['default'])
+        self.assertEqual([error.id for error in errors], ['recipes.E001'])
+        self.assertIn(trigger, errors[0].msg)
+
+    def test_search_keeps_rank_order_and_rejects_cursor(self):
+        response = self.client.get('/api/recipes/?search=борщ')
+        self.assertEqual(
+            [recipe['id'] for recipe in response.data['results']],
+            [self.soup.pk, self.salad.pk],
+        )
+        response = self.client.get('/api/recipes/?search=борщ&cursor=')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('cursor', response.data)
+
+    def test_search_vector_is_not_loaded(self):
+        recipe = Recipe.objects.get(pk=self.soup.pk)
+        self.assertEqual(recipe.get_deferred_fields(), {'search_vector'})
+        recipe.name = 'Борщ украинский'
+        with CaptureQueriesContext(connection) as queries:
+            recipe.save()
+        update = next(
+            query['sql'] for query in queries.captured_queries
+            if query['sql'].startswith('UPDATE "recipes_recipe"')
+        )
+        self.assertNotIn('search_vector', update)
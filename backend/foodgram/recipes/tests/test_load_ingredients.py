@@ -0,0 +1,45 @@
+import tempfile
+from io import StringIO
+from pathlib import Path
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from recipes.management.commands.load_ingredients import DEFAULT_PATH
+from recipes.models import Ingredient
+
+
+class LoadIngredientsTests(TestCase):
+
+    def load(self, content, suffix):
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / f'ingredients{suffix}'
+            path.write_text(content, encoding='utf-8')
+            stdout, stderr = StringIO(), StringIO()
+            call_command('load_ingredients', path, '--batch-size', 2,
+                         stdout=stdout, stderr=stderr)
+        return stderr.getvalue()
+
+    def test_default_catalog_is_in_data_dir(self):
+        self.assertTrue(DEFAULT_PATH.is_file())
+        self.assertEqual(DEFAULT_PATH.parent.name, 'data')
+
+    def test_csv_skips_short_and_blank_rows(self):
+        warning = self.load(
+            'соль,г\n\nсахар\n,кг\nмука,г\n   \nмасло,мл\n', '.csv'
+        )
+        self.assertEqual(
+            sorted(Ingredient.objects.values_list('name', flat=True)),
+            ['масло', 'мука', 'соль'],
+        )
+        self.assertIn('Пропущено 2', warning)
+        self.assertIn('номера: 3, 4', warning)
+
+    def test_json_skips_incomplete_items_and_reruns_cleanly(self):
+        content = (
+            '[{"name": "соль", "measurement_unit": "г"},'
+            ' {"name": "сахар"}]'
+        )
+        self.assertIn('номера: 2', self.load(content, '.json'))
+        self.load(content, '.json')
+        self.assertEqual(Ingredient.objects.count(), 1)
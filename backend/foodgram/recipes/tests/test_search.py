@@ -0,0 +1,45 @@
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.test import TestCase
+
+from recipes.models import Ingredient
+from recipes.search import IngredientSearchIndex
+
+
+class IngredientSearchIndexTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        Ingredient.objects.create(name='Сахар', measurement_unit='г')
+        Ingredient.objects.create(name='Соль', measurement_unit='г')
+        # Индексы двух процессов с общим кэшем версий
+        self.index = IngredientSearchIndex()
+        self.other = IngredientSearchIndex()
+
+    def names(self, index, query):
+        return [ingredient.name for ingredient in index.search(query)]
+
+    def test_search_by_prefix_and_substring(self):
+        Ingredient.objects.create(name='Песок сахарный', measurement_unit='г')
+        self.assertEqual(
+            self.names(self.index, 'сах'), ['Сахар', 'Песок сахарный']
+        )
+        with self.assertNumQueries(0):
+            self.assertEqual(self.names(self.index, 'сол'), ['Соль'])
+
+    def test_changes_reach_every_process(self):
+        self.names(self.index, '')
+        self.names(self.other, '')
+        with self.captureOnCommitCallbacks(execute=True):
+            Ingredient.objects.create(name='Соль морская',
+                                      measurement_unit='г')
+        self.assertIsNone(
+            async_to_sync(self.other.asearch_if_fresh)('соль')
+        )
+        for index in (self.index, self.other):
+            self.assertEqual(
+                self.names(index, 'соль'), ['Соль', 'Соль морская']
+            )
+        self.assertEqual(
+            len(async_to_sync(self.other.asearch_if_fresh)('соль')), 2
+        )
@@ -0,0 +1,31 @@
+from django.db.models import Case, F, Value, When
+
+# Единица измерения -> (базовая единица, во сколько раз она больше базовой).
+# Базовая единица самая мелкая, поэтому множители целые и количество
+# остаётся целым
+UNIT_CONVERSIONS = {
+    'кг': ('г', 1000),
+    'л': ('мл', 1000),
+}
+
+
+def base_unit(field):
+    """Выражение с базовой единицей для единицы из поля field."""
+    return Case(
+        *(
+            When(**{field: unit}, then=Value(base))
+            for unit, (base, _) in UNIT_CONVERSIONS.items()
+        ),
+        default=F(field),
+    )
+
+
+def unit_factor(field):
+    """Выражение с множителем перевода единицы из поля field в базовую."""
+    return Case(
+        *(
+            When(**{field: unit}, then=Value(factor))
+            for unit, (_, factor) in UNIT_CONVERSIONS.items()
+        ),
+        default=Value(1),
+    )
@@ -9,11 +9,15 @@ User = get_user_model()
 @admin.register(User)
 class UserAdmin(admin.ModelAdmin):
     list_display = ('email', 'username', 'first_name', 'last_name')
-    list_filter = ('email', 'username')
+    search_fields = ('email', 'username')
+    list_filter = ('is_staff', 'is_active')
 
 
 @admin.register(Follow)
 class FollowAdmin(admin.ModelAdmin):
     list_display = ('pk', 'user', 'author')
-    search_fields = ('user', )
-    list_filter = ('user', )
+    list_select_related = ('user', 'author')
+    search_fields = (
+        'user__username', 'user__email', 'author__username', 'author__email'
+    )
+    autocomplete_fields = ('user', 'author')
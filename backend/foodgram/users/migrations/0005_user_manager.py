@@ -0,0 +1,20 @@
+# Generated by Django 4.0.1 on 2026-10-18 03:17
+
+from django.db import migrations
+import users.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0004_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterModelManagers(
+            name='user',
+            managers=[
+                ('objects', users.models.CounterUserManager()),
+            ],
+        ),
+    ]
@@ -1,9 +1,21 @@
-from django.contrib.auth.models import AbstractUser
+from django.contrib.auth.models import AbstractUser, UserManager
 from django.db import models
 
+from foodgram.counters import deferred_counters
 from users.utils import username_validator
 
 
+class UserQuerySet(models.QuerySet):
+
+    def delete(self):
+        with deferred_counters(self.model):
+            return super().delete()
+
+
+class CounterUserManager(UserManager.from_queryset(UserQuerySet)):
+    pass
+
+
 class User(AbstractUser):
 
     email = models.EmailField(
@@ -25,6 +37,18 @@ class User(AbstractUser):
         max_length=150,
         verbose_name='фамилия',
     )
+    recipes_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='рецептов',
+    )
+    followers_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='подписчиков',
+    )
+
+    objects = CounterUserManager()
 
     class Meta:
         ordering = ['id']
@@ -32,6 +56,11 @@ class User(AbstractUser):
     def __str__(self):
         return self.username
 
+    def delete(self, *args, **kwargs):
+        # Каскадное удаление обновляет счётчики связанных объектов разом
+        with deferred_counters(type(self)):
+            return super().delete(*args, **kwargs)
+
 
 class Follow(models.Model):
 
@@ -57,6 +86,11 @@ class Follow(models.Model):
                 fields=['user', 'author'], name='follow_unique'
             )
         ]
+        indexes = [
+            models.Index(
+                fields=['author', 'user'], name='follow_author_user_idx'
+            )
+        ]
 
     def __str__(self):
         return f'follower - {self.user} following - {self.author}'
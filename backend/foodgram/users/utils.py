@@ -1,6 +1,41 @@
 from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from django.db.models.signals import post_delete
 
 
 def username_validator(username):
     if username == 'me':
         raise ValidationError('Name "me" is required for system needs')
+
+
+def create_link(model, **values):
+    """Создаёт связь (подписку, избранное, корзину) без проверки заранее.
+
+    Повтор отсекает уникальное ограничение модели, поэтому одновременные
+    запросы не создают дублей. Возвращает связь или None, если она уже
+    была. Счётчики, ленты и кэши обновляют обработчики post_save.
+    """
+    try:
+        with transaction.atomic():
+            return model.objects.create(**values)
+    except IntegrityError:
+        return None
+
+
+def delete_link(model, **filters):
+    """Удаляет связь одним условным DELETE, True если она была.
+
+    Из одновременных запросов строку удаляет только один, это видно
+    по числу удалённых строк, и только он отправляет post_delete,
+    по которому обновляются счётчики, ленты и кэши. Зависимых строк
+    у связей нет, поэтому удаление обходится без каскада и без
+    предварительного SELECT.
+    """
+    with transaction.atomic():
+        queryset = model.objects.filter(**filters)
+        deleted = queryset._raw_delete(queryset.db)
+        if deleted:
+            post_delete.send(
+                sender=model, instance=model(**filters), using=queryset.db
+            )
+    return deleted > 0